@@ -12,13 +12,18 @@
     'depends': [
         'sale',
         'project',
+        'sale_project',
     ],
     'data': [
         'security/ir.model.access.csv',
         'security/segment_security.xml',
+        'data/ir_cron_data.xml',
         'views/sale_order_segment_views.xml',
         'views/sale_order_views.xml',
         'views/project_task_views.xml',
+        'views/res_config_settings_views.xml',
+        'wizard/sale_order_bulk_confirm_views.xml',
+        'wizard/sale_order_segment_report_wizard_views.xml',
         'report/sale_order_segment_report.xml',
         'report/sale_order_segment_template.xml',
     ],
@@ -0,0 +1 @@
+from . import segment_export
@@ -0,0 +1,134 @@
+import csv
+import io
+import tempfile
+
+import xlsxwriter
+
+from odoo import api, http
+from odoo.http import content_disposition, request
+
+# Segments read per query; their lines are read together right after
+EXPORT_BATCH_SIZE = 500
+# Bytes per response chunk when streaming the finished XLSX file
+EXPORT_STREAM_CHUNK = 64 * 1024
+
+EXPORT_HEADERS = [
+    'Pedido', 'Nº', 'Nivel', 'Ruta', 'Tipo', 'Descripción', 'Producto',
+    'Cantidad', 'Unidad', 'Precio unitario', 'Subtotal', 'Total',
+]
+SEGMENT_FIELDS = ['outline_number', 'outline_sort_key', 'level', 'full_path', 'name', 'subtotal', 'total']
+LINE_FIELDS = ['segment_id', 'name', 'product_id', 'product_uom_qty', 'product_uom', 'price_unit', 'price_subtotal']
+
+
+class SegmentExportController(http.Controller):
+
+    @http.route('/spora_segment/export/<string:file_format>', type='http', auth='user')
+    def export_segment_hierarchy(self, file_format, order_ids='', **kwargs):
+        """Stream the segment tree of one or more orders as XLSX or CSV.
+
+        Rows are produced by a generator that runs after this request's
+        cursor is closed, so it reads through a cursor of its own, batch by
+        batch, and memory does not grow with the size of the orders.
+        """
+        if file_format not in ('xlsx', 'csv'):
+            raise request.not_found()
+        orders = request.env['sale.order'].browse(
+            [int(order_id) for order_id in order_ids.split(',') if order_id]
+        ).exists()
+        if not orders:
+            raise request.not_found()
+        orders.check_access('read')
+
+        rows = _iter_export_rows(request.env.registry, request.env.uid, dict(request.env.context), orders.ids)
+        if file_format == 'csv':
+            body, mimetype = _stream_csv(rows), 'text/csv;charset=utf-8'
+        else:
+            body = _stream_xlsx(rows)
+            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        filename = (orders.name if len(orders) == 1 else 'presupuestos') + f'_segmentos.{file_format}'
+        response = request.make_response(body, headers=[
+            ('Content-Type', mimetype),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
+        response.direct_passthrough = True
+        return response
+
+
+def _iter_export_rows(registry, uid, context, order_ids):
+    """Yield the header, then one row per segment and per line, in outline order."""
+    yield EXPORT_HEADERS
+    with registry.cursor() as cr:
+        env = api.Environment(cr, uid, context)
+        for order in env['sale.order'].browse(order_ids):
+            order_name = order.name
+            for segments in _iter_segment_batches(env, order.id):
+                lines_by_segment = {}
+                for line in env['sale.order.line'].search_fetch(
+                    [('segment_id', 'in', segments.ids)], LINE_FIELDS, order='sequence, id',
+                ):
+                    lines_by_segment.setdefault(line.segment_id.id, []).append(line)
+                for segment in segments:
+                    yield [
+                        order_name, segment.outline_number, segment.level, segment.full_path,
+                        'Segmento', segment.name, '', '', '', '', segment.subtotal, segment.total,
+                    ]
+                    for line in lines_by_segment.get(segment.id, []):
+                        yield [
+                            order_name, segment.outline_number, segment.level + 1, segment.full_path,
+                            'Línea', line.name, line.product_id.name, line.product_uom_qty,
+                            line.product_uom.name, line.price_unit, line.price_subtotal, '',
+                        ]
+                # Keep memory flat: drop the records of this batch
+                env.invalidate_all()
+
+
+def _iter_segment_batches(env, order_id):
+    """Yield the segments of an order in outline order, EXPORT_BATCH_SIZE at a time.
+
+    Pages are fetched by keyset on (outline_sort_key, id), which follows the
+    sale_order_segment_order_outline_idx index. Segments under an archived
+    ancestor (numbered 0 at that level) are left out, like in the report.
+    """
+    Segment = env['sale.order.segment']
+    last_key, last_id = '', 0
+    while True:
+        segments = Segment.search_fetch([
+            ('order_id', '=', order_id),
+            '|',
+            ('outline_sort_key', '>', last_key),
+            '&', ('outline_sort_key', '=', last_key), ('id', '>', last_id),
+        ], SEGMENT_FIELDS, order='outline_sort_key, id', limit=EXPORT_BATCH_SIZE)
+        if not segments:
+            return
+        last_key, last_id = segments[-1].outline_sort_key, segments[-1].id
+        yield segments.filtered(lambda s: '0' not in (s.outline_number or '').split('.'))
+
+
+def _stream_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_STREAM_CHUNK:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _stream_xlsx(rows):
+    """Write rows to a constant-memory workbook on disk, then stream the file.
+
+    An XLSX file is a zip archive that only exists once the workbook is
+    closed; constant_memory flushes every row to a temporary file meanwhile.
+    """
+    with tempfile.TemporaryFile() as output:
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        sheet = workbook.add_worksheet('Segmentos')
+        bold = workbook.add_format({'bold': True})
+        for row_index, row in enumerate(rows):
+            sheet.write_row(row_index, 0, row, bold if row_index == 0 or row[4] == 'Segmento' else None)
+        workbook.close()
+        output.seek(0)
+        while chunk := output.read(EXPORT_STREAM_CHUNK):
+            yield chunk
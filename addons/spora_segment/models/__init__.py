@@ -1,5 +1,10 @@
 from . import sale_order_segment
+from . import sale_order_segment_closure
 from . import sale_order
 from . import sale_order_line
 from . import project_task
 from . import project_project
+from . import res_config_settings
+from . import product_template
+from . import product_product
+from . import ir_actions_report
@@ -0,0 +1,195 @@
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from lxml import html as lxml_html
+from reportlab.pdfgen import canvas
+
+from odoo import models, api
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+
+_logger = logging.getLogger(__name__)
+
+SEGMENT_REPORT_NAME = 'spora_segment.report_saleorder_document_segment'
+SEGMENT_REPORT_CACHE_PREFIX = 'segment_budget_'
+# Concurrent wkhtmltopdf processes when a large report is rendered in chunks
+SEGMENT_REPORT_CHUNK_WORKERS = 4
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    def _render_qweb_pdf_prepare_streams(self, report_ref, data, res_ids=None):
+        """Serve the segment budget PDF from its content-addressed cache.
+
+        Each order's PDF is stored as an attachment named after the digest of
+        everything it prints (see _get_report_digests). An unchanged order is
+        served from the attachment; a changed one gets a new digest, is
+        rendered and replaces its previous cached PDF.
+        """
+        report = self._get_report(report_ref)
+        if (
+            report.report_name != SEGMENT_REPORT_NAME
+            or not res_ids
+            or len(set(res_ids)) != len(res_ids)
+            or set(data or {}) - {'report_type'}
+            or self.env.context.get('report_pdf_no_attachment')
+        ):
+            return super()._render_qweb_pdf_prepare_streams(report_ref, data, res_ids=res_ids)
+
+        orders = self.env['sale.order'].browse(res_ids)
+        orders.check_access('read')
+        digests = self.env['report.' + SEGMENT_REPORT_NAME]._get_report_digests(orders)
+        cached = self._get_segment_report_cache(orders)
+
+        streams = {}
+        for order in orders:
+            attachment = cached.get((order.id, digests[order.id]))
+            if attachment:
+                streams[order.id] = {'stream': io.BytesIO(attachment.raw), 'attachment': None}
+                continue
+            stream_data = self._render_segment_report_pdf(report_ref, data, order)
+            self._store_segment_report_cache(order, digests[order.id], stream_data['stream'].getvalue())
+            streams[order.id] = stream_data
+        return streams
+
+    def _render_segment_report_pdf(self, report_ref, data, order):
+        """Render the budget PDF of one order, in parallel chunks when it is large.
+
+        Small orders go through the standard pipeline. Large ones are split
+        into row ranges (see _get_row_chunks); every range is rendered to its
+        own HTML document and converted by its own wkhtmltopdf process, and
+        the PDFs are merged with continuous page numbers.
+
+        Returns:
+            dict: stream data as returned by _render_qweb_pdf_prepare_streams
+        """
+        SegmentReport = self.env['report.' + SEGMENT_REPORT_NAME]
+        # Rows are flattened once; every chunk render slices them
+        with SegmentReport._prebuild_segment_rows(order) as rows:
+            chunks = SegmentReport._get_row_chunks(order, rows=rows[order.id])
+            if len(chunks) <= 1:
+                # One record per rendering, so the PDF never needs to be split
+                return super()._render_qweb_pdf_prepare_streams(report_ref, data, res_ids=[order.id])[order.id]
+
+            report = self._get_report(report_ref)
+            jobs = []
+            for start, end in chunks:
+                html = self._render_qweb_html(
+                    report_ref, [order.id], data=dict(data or {}, report_type='pdf', segment_row_range=[start, end]),
+                )[0]
+                bodies, _html_ids, header, footer, paperformat_args = self._prepare_html(html, report_model=report.model)
+                jobs.append({
+                    'bodies': bodies,
+                    'header': header,
+                    'footer': self._strip_page_numbers(footer),
+                    'specific_paperformat_args': paperformat_args,
+                })
+        _logger.info('Rendering segment budget of order %s in %d chunks', order.name, len(jobs))
+
+        if self.env.registry.in_test_mode():
+            # New cursors cannot see uncommitted data: render one after another
+            pdfs = [self._run_segment_report_chunk(report_ref, job) for job in jobs]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(SEGMENT_REPORT_CHUNK_WORKERS, len(jobs)),
+                thread_name_prefix='segment_report_chunk',
+            ) as executor:
+                pdfs = list(executor.map(
+                    self._run_segment_report_chunk_in_new_cursor,
+                    [report_ref] * len(jobs),
+                    jobs,
+                    [self.env.uid] * len(jobs),
+                    [dict(self.env.context)] * len(jobs),
+                ))
+        return {'stream': io.BytesIO(self._merge_segment_report_chunks(pdfs)), 'attachment': None}
+
+    def _run_segment_report_chunk(self, report_ref, job):
+        return self._run_wkhtmltopdf(
+            job['bodies'],
+            report_ref=report_ref,
+            header=job['header'],
+            footer=job['footer'],
+            landscape=self._context.get('landscape'),
+            specific_paperformat_args=job['specific_paperformat_args'],
+            set_viewport_size=self._context.get('set_viewport_size'),
+        )
+
+    def _run_segment_report_chunk_in_new_cursor(self, report_ref, job, uid, context):
+        """Worker body: wkhtmltopdf reads the paper format through its own cursor."""
+        with self.pool.cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            return env['ir.actions.report']._run_segment_report_chunk(report_ref, job)
+
+    @api.model
+    def _strip_page_numbers(self, footer):
+        """Drop the per-document page counters from a footer.
+
+        wkhtmltopdf numbers the pages of each chunk from 1, so the counters
+        are stamped on the merged PDF instead.
+        """
+        if not footer:
+            return footer
+        root = lxml_html.fromstring(footer)
+        for counter in root.xpath("//*[contains(concat(' ', normalize-space(@class), ' '), ' page ')]"):
+            container = counter.getparent()
+            if container is not None and container.getparent() is not None:
+                container.getparent().remove(container)
+        return lxml_html.tostring(root, encoding='unicode')
+
+    @api.model
+    def _merge_segment_report_chunks(self, pdfs):
+        """Concatenate chunk PDFs and number the pages of the whole document."""
+        pages = [
+            page
+            for pdf in pdfs
+            for reader in [PdfFileReader(io.BytesIO(pdf), strict=False)]
+            for page in (reader.getPage(index) for index in range(reader.getNumPages()))
+        ]
+        writer = PdfFileWriter()
+        for number, page in enumerate(pages, start=1):
+            page.mergePage(self._get_page_number_overlay(page, number, len(pages)))
+            writer.addPage(page)
+        output = io.BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+    @api.model
+    def _get_page_number_overlay(self, page, number, total):
+        width, height = float(page.mediaBox.getWidth()), float(page.mediaBox.getHeight())
+        buffer = io.BytesIO()
+        overlay = canvas.Canvas(buffer, pagesize=(width, height))
+        overlay.setFont('Helvetica', 8)
+        overlay.drawRightString(width - 28, 14, f'Página {number} / {total}')
+        overlay.save()
+        return PdfFileReader(io.BytesIO(buffer.getvalue()), strict=False).getPage(0)
+
+    def _get_segment_report_cache(self, orders):
+        """Return the cached PDFs of the orders, keyed by (order id, digest)."""
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'sale.order'),
+            ('res_id', 'in', orders.ids),
+            ('name', '=like', f'{SEGMENT_REPORT_CACHE_PREFIX}%.pdf'),
+        ])
+        return {
+            (attachment.res_id, attachment.name.removeprefix(SEGMENT_REPORT_CACHE_PREFIX).removesuffix('.pdf')):
+                attachment
+            for attachment in attachments
+        }
+
+    def _store_segment_report_cache(self, order, digest, pdf):
+        """Store a rendered PDF, replacing the previous version of the order."""
+        Attachment = self.env['ir.attachment'].sudo()
+        Attachment.search([
+            ('res_model', '=', 'sale.order'),
+            ('res_id', '=', order.id),
+            ('name', '=like', f'{SEGMENT_REPORT_CACHE_PREFIX}%.pdf'),
+        ]).unlink()
+        Attachment.create({
+            'name': f'{SEGMENT_REPORT_CACHE_PREFIX}{digest}.pdf',
+            'raw': pdf,
+            'res_model': 'sale.order',
+            'res_id': order.id,
+            'mimetype': 'application/pdf',
+        })
+        _logger.info('Cached segment budget PDF of order %s', order.name)
@@ -0,0 +1,39 @@
+from odoo import models, api
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        products = super().create(vals_list)
+        if products._get_tracked_services():
+            self.env['sale.order']._invalidate_task_creation_conflict_data()
+        return products
+
+    def write(self, vals):
+        # Template fields (service_tracking, type, sale_ok, name) are handled
+        # by product.template.write, variants only own their active flag
+        if 'active' not in vals:
+            return super().write(vals)
+        tracked = self._get_tracked_services()
+        res = super().write(vals)
+        if self._get_tracked_services() != tracked:
+            self.env['sale.order']._invalidate_task_creation_conflict_data()
+        return res
+
+    def unlink(self):
+        tracked = self._get_tracked_services()
+        res = super().unlink()
+        if tracked:
+            self.env['sale.order']._invalidate_task_creation_conflict_data()
+        return res
+
+    def _get_tracked_services(self):
+        """Return {id: name} of these variants counted by sale.order.check_task_creation_conflicts."""
+        return {
+            product.id: product.name
+            for product in self
+            if product.active and product.type == 'service' and product.sale_ok
+            and product.service_tracking != 'no'
+        }
@@ -0,0 +1,26 @@
+from odoo import models
+
+# Product fields counted by sale.order.check_task_creation_conflicts
+CONFLICT_CHECK_FIELDS = {'service_tracking', 'type', 'sale_ok', 'active', 'name'}
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    def write(self, vals):
+        if not CONFLICT_CHECK_FIELDS.intersection(vals):
+            return super().write(vals)
+        variants = self.with_context(active_test=False).product_variant_ids
+        tracked = variants._get_tracked_services()
+        res = super().write(vals)
+        if variants._get_tracked_services() != tracked:
+            self.env['sale.order']._invalidate_task_creation_conflict_data()
+        return res
+
+    def update_field_translations(self, field_name, translations, *args, **kwargs):
+        res = super().update_field_translations(field_name, translations, *args, **kwargs)
+        if field_name == 'name':
+            # Translation edits bypass write(): recompute what depends on the
+            # name, like the translated product preview of segments
+            self.modified(['name'])
+        return res
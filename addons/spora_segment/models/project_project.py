@@ -77,4 +77,14 @@ class ProjectProject(models.Model):
                         )
 
         # Call super to execute the actual write
-        return super().write(vals)
+        res = super().write(vals)
+
+        if vals.get('sale_line_id'):
+            # Forget the project on orders it no longer belongs to
+            new_order = self.env['sale.order.line'].browse(vals['sale_line_id']).order_id
+            self.env['sale.order'].search([
+                ('segment_project_id', 'in', self.ids),
+                ('id', '!=', new_order.id),
+            ]).segment_project_id = False
+
+        return res
@@ -1,5 +1,14 @@
+import logging
+
+from psycopg2.errors import UniqueViolation
+
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL, index_exists
+
+_logger = logging.getLogger(__name__)
+
+SEGMENT_TASK_UNIQUE_INDEX = 'project_task_segment_task_unique_idx'
 
 
 class ProjectTask(models.Model):
@@ -14,6 +23,65 @@ class ProjectTask(models.Model):
         help='Reference to the originating budget segment. '
              'Only visible for projects linked to sale orders.',
     )
+    is_segment_task = fields.Boolean(
+        string='Generated Segment Task',
+        copy=False,
+        readonly=True,
+        help='Task generated from the budget segment itself (not a product '
+             'task, nor a task linked to the segment by hand).',
+    )
+
+    def init(self):
+        super().init()
+        # One generated task per segment and project: concurrent generations
+        # of the same order fail on insert instead of creating duplicates
+        if index_exists(self._cr, SEGMENT_TASK_UNIQUE_INDEX):
+            return
+        self._backfill_is_segment_task()
+        try:
+            with self._cr.savepoint(flush=False):
+                self._cr.execute(SQL(
+                    "CREATE UNIQUE INDEX %s ON %s (segment_id, project_id) WHERE is_segment_task",
+                    SQL.identifier(SEGMENT_TASK_UNIQUE_INDEX),
+                    SQL.identifier(self._table),
+                ))
+        except UniqueViolation:
+            _logger.warning(
+                'Could not create index %s: duplicated segment tasks exist. '
+                'Remove the duplicates and update the module.',
+                SEGMENT_TASK_UNIQUE_INDEX
+            )
+
+    def _backfill_is_segment_task(self):
+        """Flag the segment tasks generated before is_segment_task existed.
+
+        A generated segment task has a segment, no sale line and sits in the
+        project of the segment's order. When several tasks match a segment,
+        the oldest one (created at confirmation) is taken; the others are
+        left as tasks linked by hand.
+        """
+        self._cr.execute(SQL("""
+            UPDATE project_task task
+               SET is_segment_task = TRUE
+              FROM (
+                    SELECT DISTINCT ON (t.segment_id, t.project_id) t.id
+                      FROM project_task t
+                      JOIN sale_order_segment segment ON segment.id = t.segment_id
+                      JOIN project_project project ON project.id = t.project_id
+                      JOIN sale_order_line line ON line.id = project.sale_line_id
+                     WHERE t.sale_line_id IS NULL
+                       AND line.order_id = segment.order_id
+                       AND NOT EXISTS (
+                            SELECT 1 FROM project_task flagged
+                             WHERE flagged.segment_id = t.segment_id
+                               AND flagged.project_id = t.project_id
+                               AND flagged.is_segment_task)
+                  ORDER BY t.segment_id, t.project_id, t.id
+                   ) legacy
+             WHERE task.id = legacy.id
+        """))
+        if self._cr.rowcount:
+            _logger.info('Flagged %d existing segment tasks as generated', self._cr.rowcount)
 
     @api.onchange('segment_id', 'project_id')
     def _onchange_segment_order_warning(self):
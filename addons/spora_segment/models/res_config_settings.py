@@ -0,0 +1,44 @@
+from odoo import models, fields
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = 'res.config.settings'
+
+    segment_closure_table = fields.Boolean(
+        string='Segment Closure Table',
+        config_parameter='spora_segment.closure_table',
+        help='Maintain an ancestor/descendant table for budget segments so that '
+             'subtree lookups, depth checks and total rollups use indexed joins '
+             'instead of parent_path prefix scans. Recommended for large databases.',
+    )
+
+    segment_tasks_async = fields.Boolean(
+        string='Generate Segment Tasks in Background',
+        config_parameter='spora_segment.async_task_generation',
+        help='Confirm orders immediately and generate the project tasks of their '
+             'segments in a scheduled background job. The user is notified when '
+             'the generation finishes.',
+    )
+
+    segment_task_profile = fields.Selection(
+        [
+            ('standard', 'Standard (chatter and tracking per task)'),
+            ('quiet', 'Quiet (single summary on the project)'),
+        ],
+        string='Segment Task Generation Profile',
+        config_parameter='spora_segment.task_generation_profile',
+        default='standard',
+        help='Profile of task generation on interactive confirmation. Background '
+             'jobs, scheduled synchronisation and bulk confirmation always use '
+             'the quiet profile.',
+    )
+
+    def set_values(self):
+        Segment = self.env['sale.order.segment']
+        closure_was_enabled = Segment._closure_enabled()
+        super().set_values()
+        if self.segment_closure_table and not closure_was_enabled:
+            Segment._rebuild_closure()
+        elif not self.segment_closure_table and closure_was_enabled:
+            # Do not leave rows behind that would go stale
+            Segment._clear_closure()
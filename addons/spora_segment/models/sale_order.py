@@ -1,9 +1,66 @@
 import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+
+from psycopg2.errors import UniqueViolation
 
 from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.tools import SQL, ormcache, str2bool
+from odoo.tools.sql import table_exists
 
 _logger = logging.getLogger(__name__)
 
+ASYNC_TASKS_PARAM = 'spora_segment.async_task_generation'
+SEGMENT_TASK_MAX_ATTEMPTS = 3
+SEGMENT_TASK_RETRY_DELAY = timedelta(minutes=5)
+# A running job without progress for this long lost its worker (killed on
+# time limit, crashed) and is picked up again by the cron
+SEGMENT_TASK_STALE_AFTER = timedelta(minutes=30)
+# Tasks created per create() call; background jobs beat between batches
+SEGMENT_TASK_CREATE_BATCH = 500
+# First key of the (namespace, order id) session advisory locks held while
+# the segment tasks of an order are generated
+SEGMENT_TASK_LOCK_NAMESPACE = 7310
+# Task fields kept in line with the segment tree by _create_segment_tasks
+SEGMENT_TASK_SYNC_FIELDS = ('name', 'parent_id', 'sequence', 'allocated_hours', 'active')
+# Modules known to generate project tasks from sale orders on their own
+CONFLICTING_TASK_MODULES = [
+    'sale_project_task_custom',
+    'jumo_spora_project_task_from_sale',
+    'project_task_auto_create',
+]
+# Sequence whose value is part of the cache key of the conflict check data;
+# product changes affecting the check take a new value
+CONFLICT_CACHE_SEQUENCE = 'spora_segment_task_conflict_version'
+TASK_PROFILE_PARAM = 'spora_segment.task_generation_profile'
+# Context applied while generating tasks, per generation profile. The quiet
+# profile skips tracking values, creation logs and follower subscriptions;
+# a single summary is posted on the project instead.
+SEGMENT_TASK_PROFILES = {
+    'standard': {},
+    'quiet': {
+        'tracking_disable': True,
+        'mail_create_nolog': True,
+        'mail_create_nosubscribe': True,
+        'mail_notrack': True,
+        'mail_auto_subscribe_no_notify': True,
+    },
+}
+# Profile of background and bulk generation, unless the context says otherwise
+BULK_SEGMENT_TASK_PROFILE = 'quiet'
+# Cost model of _estimate_segment_task_plan, measured on generation runs:
+# fixed queries per created level (savepoint, batch insert, recomputes),
+# queries per created task (defaults, followers, tracking) and per write batch
+ESTIMATE_QUERIES_PER_LEVEL = 6
+ESTIMATE_QUERIES_PER_TASK = 8
+ESTIMATE_QUERIES_PER_WRITE = 4
+ESTIMATE_SECONDS_PER_QUERY = 0.002
+# Above this estimated duration the preview advises background generation
+ESTIMATE_ASYNC_THRESHOLD = 30
+
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
@@ -20,6 +77,70 @@ class SaleOrder(models.Model):
         compute='_compute_segment_count',
     )
 
+    segment_task_state = fields.Selection(
+        [
+            ('queued', 'Queued'),
+            ('running', 'Running'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ],
+        string='Task Generation',
+        copy=False,
+        readonly=True,
+        index=True,
+        help='State of the background job generating the project tasks of the segments.',
+    )
+    segment_task_progress = fields.Integer(
+        string='Task Generation Progress',
+        copy=False,
+        readonly=True,
+        help='Percentage of segment levels whose tasks have been generated.',
+    )
+    segment_task_attempts = fields.Integer(
+        string='Task Generation Attempts',
+        copy=False,
+        readonly=True,
+    )
+    segment_task_retry_at = fields.Datetime(
+        string='Next Task Generation Attempt',
+        copy=False,
+        readonly=True,
+    )
+    segment_task_heartbeat = fields.Datetime(
+        string='Task Generation Heartbeat',
+        copy=False,
+        readonly=True,
+        help='Last time the running job reported progress.',
+    )
+    segment_task_error = fields.Text(
+        string='Task Generation Error',
+        copy=False,
+        readonly=True,
+    )
+    segment_project_id = fields.Many2one(
+        'project.project',
+        string='Segment Project',
+        copy=False,
+        readonly=True,
+        index='btree_not_null',
+        ondelete='set null',
+        help='Project holding the tasks generated from the segments of this order.',
+    )
+    segment_tasks_outdated = fields.Boolean(
+        string='Segment Tasks Outdated',
+        copy=False,
+        readonly=True,
+        index=True,
+        help='Segments or lines changed since the project tasks were last synchronised.',
+    )
+    segment_task_user_id = fields.Many2one(
+        'res.users',
+        string='Task Generation Requested By',
+        copy=False,
+        readonly=True,
+        help='User notified when the background task generation finishes.',
+    )
+
     def _compute_segment_count(self):
         """Count segments for smart button badge."""
         for order in self:
@@ -40,82 +161,309 @@ class SaleOrder(models.Model):
     def action_confirm(self):
         """Override to create hierarchical tasks from segments.
 
-        CRITICAL: For orders with segments, disables native Odoo service_tracking task creation:
+        CRITICAL: For orders with segments, native Odoo service_tracking task
+        creation is skipped (see sale.order.line._timesheet_service_generation):
         - Prevents duplicate tasks (Odoo native + our segment tasks)
         - Prevents broken hierarchy (native tasks created as root instead of under segments)
-        - Manually creates project if needed (since service_tracking='no' prevents project creation)
+        - Manually creates project if needed (since native generation is skipped)
+
+        Product records are never written, so concurrent confirmations of
+        orders sharing products do not contend for locks.
 
         Flow for orders WITH segments:
-        1. Temporarily set service_tracking='no' on service products
-        2. Call super() to handle order confirmation logic
-        3. Manually create project if not exists
-        4. Create hierarchical segment+product tasks
-        5. Restore original service_tracking
+        1. Call super() to handle order confirmation logic (no native tasks)
+        2. Manually create project if not exists
+        3. Create hierarchical segment+product tasks
 
         Flow for orders WITHOUT segments:
         - Normal Odoo flow (no changes)
+
+        When asynchronous task generation is enabled (settings, or the
+        ``segment_tasks_async`` context key), steps 2 and 3 are deferred to
+        a background job run by ir.cron (see _enqueue_segment_tasks).
         """
         # Identify orders with segments that need special handling
         orders_with_segments = self.filtered(lambda o: o.segment_ids)
-        orders_without_segments = self - orders_with_segments
+        if orders_with_segments:
+            diagnostics = self.check_task_creation_conflicts()
+            for conflict in diagnostics['conflicts']:
+                _logger.warning(
+                    'Confirming orders %s with segments: %s',
+                    ', '.join(orders_with_segments.mapped('name')),
+                    conflict['message']
+                )
 
-        # Store original service_tracking values for orders with segments
-        tracking_backup = {}
+        # Native Odoo confirmation flow
+        res = super().action_confirm()
+
+        if orders_with_segments and self._segment_tasks_async():
+            # Confirm right away, generate the tasks in a cron worker
+            orders_with_segments._enqueue_segment_tasks()
+            orders_with_segments = self.browse()
+
+        # For orders with segments: create project + segment tasks
         for order in orders_with_segments:
-            for line in order.order_line:
-                if line.product_id.type == 'service' and hasattr(line.product_id, 'service_tracking'):
-                    tracking_backup[line.product_id.id] = line.product_id.service_tracking
-                    # Temporarily disable to prevent native task creation
-                    line.product_id.service_tracking = 'no'
+            _logger.info(
+                'Processing order %s with %d segments',
+                order.name,
+                len(order.segment_ids)
+            )
 
-        try:
-            # Native Odoo confirmation flow
-            res = super().action_confirm()
+            # Create project if needed (native generation was skipped)
+            project = order._ensure_project_exists()
 
-            # For orders with segments: create project + segment tasks
-            for order in orders_with_segments:
+            if project:
                 _logger.info(
-                    'Processing order %s with %d segments',
-                    order.name,
-                    len(order.segment_ids)
+                    'Project %s found/created for order %s, creating segment tasks',
+                    project.name,
+                    order.name
+                )
+                # Create hierarchical segment + product tasks
+                order._create_segment_tasks()
+            else:
+                _logger.warning(
+                    'Could not create or find project for order %s. Skipping segment tasks.',
+                    order.name
                 )
 
-                # Create project if needed (native flow didn't create it due to tracking='no')
-                project = order._ensure_project_exists()
+        return res
 
-                if project:
-                    _logger.info(
-                        'Project %s found/created for order %s, creating segment tasks',
-                        project.name,
-                        order.name
-                    )
-                    # Create hierarchical segment + product tasks
-                    order._create_segment_tasks()
-                else:
-                    _logger.warning(
-                        'Could not create or find project for order %s. Skipping segment tasks.',
-                        order.name
-                    )
+    @api.model
+    def _segment_tasks_async(self):
+        """Whether segment tasks are generated by a background job on confirm."""
+        if 'segment_tasks_async' in self.env.context:
+            return bool(self.env.context['segment_tasks_async'])
+        return str2bool(
+            self.env['ir.config_parameter'].sudo().get_param(ASYNC_TASKS_PARAM, 'False'),
+            default=False,
+        )
 
-            # Restore original service_tracking
-            for product_id, original_tracking in tracking_backup.items():
-                product = self.env['product.product'].browse(product_id)
-                if product.exists():
-                    product.service_tracking = original_tracking
+    def _enqueue_segment_tasks(self):
+        """Queue the generation of segment tasks and wake up the cron worker."""
+        self.write({
+            'segment_task_state': 'queued',
+            'segment_task_progress': 0,
+            'segment_task_attempts': 0,
+            'segment_task_retry_at': False,
+            'segment_task_error': False,
+            'segment_task_user_id': self.env.user.id,
+        })
+        self.env.ref('spora_segment.ir_cron_segment_task_generation')._trigger()
+        _logger.info(
+            'Queued segment task generation for orders %s',
+            ', '.join(self.mapped('name'))
+        )
 
+    def _get_segment_task_job_domain(self):
+        """Queued jobs that are due, and running jobs whose worker is gone."""
+        now = fields.Datetime.now()
+        return [
+            '|',
+            '&',
+            ('segment_task_state', '=', 'queued'),
+            '|',
+            ('segment_task_retry_at', '=', False),
+            ('segment_task_retry_at', '<=', now),
+            '&',
+            ('segment_task_state', '=', 'running'),
+            '|',
+            # Jobs left running before heartbeats were recorded
+            ('segment_task_heartbeat', '=', False),
+            ('segment_task_heartbeat', '<', now - SEGMENT_TASK_STALE_AFTER),
+        ]
+
+    @api.model
+    def _cron_generate_segment_tasks(self):
+        """Run the queued segment task generation jobs, one order per call.
+
+        The cron runner commits and calls again while _notify_progress reports
+        remaining jobs, so each order is generated in its own transaction.
+        """
+        domain = self._get_segment_task_job_domain()
+        order = self.browse()
+        alive = 0
+        for candidate in self.search(domain, order='id'):
+            if candidate.segment_task_state == 'running' and not candidate._segment_task_lock_is_free():
+                # Its worker still holds the lock: only the heartbeat is late
+                alive += 1
+                continue
+            order = candidate
+            break
+        if order:
+            auto_commit = not getattr(threading.current_thread(), 'testing', False)
+            order.with_context(
+                segment_task_auto_commit=auto_commit,
+                segment_task_profile=self.env.context.get('segment_task_profile', BULK_SEGMENT_TASK_PROFILE),
+            )._run_segment_task_job()
+        self.env['ir.cron']._notify_progress(
+            done=len(order),
+            remaining=max(0, self.search_count(domain) - alive),
+        )
+
+    def _run_segment_task_job(self):
+        """Generate the project and segment tasks of a queued order.
+
+        Failed attempts are retried by a later cron run until
+        SEGMENT_TASK_MAX_ATTEMPTS is reached. Tasks committed by a failed
+        attempt are kept: task generation skips the tasks that already exist.
+        A job left running by a dead worker counts as a failed attempt.
+
+        The order's generation lock is held for the whole job. When another
+        worker holds it, the job is postponed without using an attempt.
+        """
+        self.ensure_one()
+        if not self._try_lock_segment_tasks():
+            _logger.info(
+                'Segment tasks of order %s are being generated by another worker, postponing the job',
+                self.name
+            )
+            retry_at = fields.Datetime.now() + SEGMENT_TASK_RETRY_DELAY
+            self.write({'segment_task_state': 'queued', 'segment_task_retry_at': retry_at})
+            self.env.ref('spora_segment.ir_cron_segment_task_generation')._trigger(retry_at)
+            return
+        try:
+            self._run_locked_segment_task_job()
+        finally:
+            self._release_segment_task_lock()
+
+    def _run_locked_segment_task_job(self):
+        if self.segment_task_state == 'running':
+            _logger.warning(
+                'Segment task generation of order %s made no progress since %s, '
+                'its worker is gone (attempt %d/%d)',
+                self.name,
+                self.segment_task_heartbeat,
+                self.segment_task_attempts,
+                SEGMENT_TASK_MAX_ATTEMPTS
+            )
+            if self.segment_task_attempts >= SEGMENT_TASK_MAX_ATTEMPTS:
+                self.write({
+                    'segment_task_state': 'failed',
+                    'segment_task_error': 'La generación de tareas se interrumpió sin terminar '
+                                          '(límite de tiempo o caída del proceso).',
+                })
+                self._notify_segment_task_job()
+                return
+        attempts = self.segment_task_attempts + 1
+        self.write({
+            'segment_task_state': 'running',
+            'segment_task_attempts': attempts,
+            'segment_task_retry_at': False,
+            'segment_task_heartbeat': fields.Datetime.now(),
+        })
+        auto_commit = self.env.context.get('segment_task_auto_commit')
+        self._commit_segment_task_job()
+        try:
+            # Progress is committed level by level in cron workers, so a
+            # savepoint can only protect the job when nothing is committed
+            with nullcontext() if auto_commit else self.env.cr.savepoint():
+                if self._ensure_project_exists() and not self._create_segment_tasks():
+                    raise UserError('El proyecto de este pedido está archivado.')
         except Exception as e:
-            # Restore tracking even on error
-            for product_id, original_tracking in tracking_backup.items():
-                product = self.env['product.product'].browse(product_id)
-                if product.exists():
-                    product.service_tracking = original_tracking
-            raise
+            if auto_commit:
+                self.env.cr.rollback()
+            _logger.exception(
+                'Segment task generation failed for order %s (attempt %d/%d)',
+                self.name,
+                attempts,
+                SEGMENT_TASK_MAX_ATTEMPTS
+            )
+            retry = attempts < SEGMENT_TASK_MAX_ATTEMPTS
+            retry_at = fields.Datetime.now() + SEGMENT_TASK_RETRY_DELAY * attempts
+            self.write({
+                'segment_task_state': 'queued' if retry else 'failed',
+                'segment_task_retry_at': retry_at if retry else False,
+                'segment_task_error': str(e),
+            })
+            if retry:
+                self.env.ref('spora_segment.ir_cron_segment_task_generation')._trigger(retry_at)
+        else:
+            self.write({
+                'segment_task_state': 'done',
+                'segment_task_progress': 100,
+                'segment_task_error': False,
+            })
+        if self.segment_task_state != 'queued':
+            self._notify_segment_task_job()
 
-        return res
+    def _report_segment_task_progress(self, done, total):
+        """Record the progress of a running job, making it visible to users."""
+        if self.segment_task_state != 'running' or not total:
+            return
+        self.write({
+            'segment_task_progress': int(done * 100 / total),
+            'segment_task_heartbeat': fields.Datetime.now(),
+        })
+        self._commit_segment_task_job()
+
+    def _segment_task_lock_is_free(self):
+        """Probe the generation lock of this order, releasing it at once."""
+        if not self._try_lock_segment_tasks():
+            return False
+        self._release_segment_task_lock()
+        return True
+
+    def _commit_segment_task_job(self):
+        if self.env.context.get('segment_task_auto_commit'):
+            self.env.cr.commit()
+
+    def _notify_segment_task_job(self):
+        """Tell the requesting user that the task generation finished."""
+        self.ensure_one()
+        partner = self.segment_task_user_id.partner_id
+        if not partner:
+            return
+        if self.segment_task_state == 'done':
+            message = {
+                'type': 'success',
+                'title': 'Tareas generadas',
+                'message': f'Las tareas del pedido {self.name} se han generado correctamente.',
+            }
+        else:
+            message = {
+                'type': 'danger',
+                'title': 'Error al generar tareas',
+                'message': f'No se pudieron generar las tareas del pedido {self.name}: '
+                           f'{self.segment_task_error}',
+                'sticky': True,
+            }
+        self.env['bus.bus']._sendone(partner, 'simple_notification', message)
+
+    def action_retry_segment_tasks(self):
+        """Requeue a failed task generation job."""
+        self.filtered(lambda o: o.segment_task_state == 'failed')._enqueue_segment_tasks()
+
+    def init(self):
+        super().init()
+        self.env.cr.execute(SQL(
+            "CREATE SEQUENCE IF NOT EXISTS %s",
+            SQL.identifier(CONFLICT_CACHE_SEQUENCE),
+        ))
+        if not table_exists(self.env.cr, 'sale_order_segment'):
+            return
+        # Link the orders confirmed before segment_project_id existed
+        self.env.cr.execute(SQL("""
+            UPDATE sale_order so
+               SET segment_project_id = linked.project_id
+              FROM (
+                    SELECT DISTINCT ON (line.order_id) line.order_id, project.id AS project_id
+                      FROM project_project project
+                      JOIN sale_order_line line ON line.id = project.sale_line_id
+                     WHERE EXISTS (
+                            SELECT 1 FROM sale_order_segment segment
+                             WHERE segment.order_id = line.order_id)
+                  ORDER BY line.order_id, project.id
+                   ) linked
+             WHERE so.id = linked.order_id
+               AND so.segment_project_id IS NULL
+        """))
 
     def _ensure_project_exists(self):
         """Ensure project exists for this order. Create if needed.
 
+        The project is stored on segment_project_id, so later lookups are a
+        single key read.
+
         Returns:
             project.project: existing or newly created project
         """
@@ -124,6 +472,8 @@ class SaleOrder(models.Model):
         # Check if project already exists
         project = self._get_project()
         if project:
+            if self.segment_project_id != project:
+                self.segment_project_id = project
             return project
 
         # Get first service line to link
@@ -138,6 +488,7 @@ class SaleOrder(models.Model):
             'company_id': self.company_id.id,
             'sale_line_id': service_line.id if service_line else False,
         })
+        self.segment_project_id = project
 
         _logger.info(
             'Created project %s for order %s (order has segments, manual creation needed)',
@@ -150,34 +501,69 @@ class SaleOrder(models.Model):
     def _get_project(self):
         """Get project for this sale order. Called after super().action_confirm() so project exists."""
         self.ensure_one()
-        # Find project linked via any order line with service product
-        project = self.env['project.project'].search([
-            ('sale_line_id.order_id', '=', self.id)
-        ], limit=1)
-        if not project:
+        return self._get_segment_projects()[self.id]
+
+    def _get_segment_projects(self):
+        """Resolve the project of several orders at once, without writing.
+
+        The stored segment_project_id is used when set. Other orders fall back
+        to the project linked via a service line of the order, then to the
+        project of any task of the order, with one query per fallback.
+
+        Returns:
+            dict: order id -> project.project (empty recordset if none)
+        """
+        Project = self.env['project.project']
+        projects = {order.id: order.segment_project_id for order in self}
+        missing = [order_id for order_id, project in projects.items() if not project]
+        if missing:
+            # Find project linked via any order line with service product
+            for project in Project.search_fetch(
+                [('sale_line_id.order_id', 'in', missing)], ['sale_line_id'], order='id',
+            ):
+                order_id = project.sale_line_id.order_id.id
+                projects[order_id] = projects[order_id] or project
+            missing = [order_id for order_id in missing if not projects[order_id]]
+        if missing:
             # Fallback: via tasks (in case tasks created manually or via different path)
-            task = self.env['project.task'].search([
-                ('sale_order_id', '=', self.id)
-            ], limit=1)
-            if task:
-                project = task.project_id
-        return project
+            for task in self.env['project.task'].search_fetch(
+                [('sale_order_id', 'in', missing)], ['sale_order_id', 'project_id'], order='id',
+            ):
+                order_id = task.sale_order_id.id
+                projects[order_id] = projects[order_id] or task.project_id
+        return projects
 
     def _create_segment_tasks(self):
-        """Create hierarchical project tasks from segments and products.
+        """Create or synchronise hierarchical project tasks from segments and products.
+
+        The full task tree is planned in memory (_prepare_segment_task_plan),
+        diffed against the existing tasks and applied level by level, with
+        one batched create() per level:
+        1. Segment tasks of level N
+        2. Product subtasks (one per line_ids) of level N-1 segments
+        3. Next level, parented to the tasks just created
 
-        Process segments recursively:
-        1. Create segment task
-        2. Create product subtasks (one per line_ids)
-        3. Recursively process child segments
+        Existing tasks whose name, parent, sequence or allocated hours no
+        longer match are written in batches, and generated tasks left without
+        segment or line are archived.
 
-        Uses savepoint isolation for each task creation to prevent cascading failures.
-        Idempotent: checks for existing tasks before creating.
+        A level whose batch fails is retried with savepoint isolation for each
+        task to prevent cascading failures.
+        Idempotent: tasks already in line with the segments are left untouched.
 
         Prevention mechanisms:
         - Checks if tasks already exist before creation
-        - Uses context flag to prevent concurrent execution
+        - Uses context flag to prevent re-entry within one call
+        - Per-order advisory lock, held across the progress commits of
+          background jobs: a worker finding the order locked skips it, the
+          worker holding the lock generates the whole tree
+        - Unique index on generated segment tasks: tasks committed by a
+          concurrent worker after our snapshot are skipped on insert
         - Validates project state before processing
+
+        Returns:
+            bool: True once the tasks mirror the segments, False when the
+            order was skipped (re-entry, no or archived project, or locked)
         """
         self.ensure_one()
 
@@ -187,7 +573,7 @@ class SaleOrder(models.Model):
                 'Skipping _create_segment_tasks for %s - already in progress',
                 self.name
             )
-            return
+            return False
 
         # Get project created by super().action_confirm()
         project = self._get_project()
@@ -198,7 +584,7 @@ class SaleOrder(models.Model):
                 'This is expected if order has no service products.',
                 self.name
             )
-            return
+            return False
 
         # Validate project is active
         if not project.active:
@@ -207,123 +593,518 @@ class SaleOrder(models.Model):
                 project.name,
                 self.name
             )
-            return
+            return False
+
+        with self._hold_segment_task_lock() as locked:
+            if not locked:
+                _logger.info(
+                    'Segment tasks of order %s are being generated by another worker. Skipping.',
+                    self.name
+                )
+                return False
 
-        # Check if segment tasks already created
-        existing_segment_tasks = self.env['project.task'].search([
-            ('segment_id', 'in', self.segment_ids.ids),
-            ('project_id', '=', project.id)
-        ])
-        if len(existing_segment_tasks) >= len(self.segment_ids):
             _logger.info(
-                'Segment tasks already created for order %s (%d tasks). Skipping.',
+                'Synchronising tasks for segments in order %s (project: %s)',
                 self.name,
-                len(existing_segment_tasks)
+                project.name
             )
-            return
+
+            # Build the whole task tree in memory, then apply it level by level
+            profile = self._get_segment_task_profile()
+            order = self.with_context(_creating_segment_tasks=True, **SEGMENT_TASK_PROFILES[profile])
+            existing = order._get_existing_task_map(project)
+            plan = order._prepare_segment_task_plan(project, existing=existing)
+            tasks = order._execute_segment_task_plan(plan)
+            archived = order._archive_obsolete_segment_tasks(plan, existing)
+            if profile == 'quiet':
+                created = sum(
+                    1 for level in plan for item in level
+                    if not item['task'] and item['key'] in tasks
+                )
+                order._post_segment_task_summary(project, created, len(archived))
+            if self.segment_tasks_outdated:
+                self.segment_tasks_outdated = False
 
         _logger.info(
-            'Creating tasks for segments in order %s (project: %s)',
-            self.name,
-            project.name
+            'Successfully synchronised segment and product tasks for order %s',
+            self.name
         )
+        return True
 
-        # Process root segments (level 1) recursively with context flag
-        root_segments = self.segment_ids.filtered(lambda s: not s.parent_id)
-        for segment in root_segments.sorted(key=lambda s: (s.sequence, s.id)):
-            self.with_context(_creating_segment_tasks=True)._create_segment_tasks_recursive(
-                segment, project, parent_task=None
-            )
+    def _get_segment_task_profile(self):
+        """Return the key of SEGMENT_TASK_PROFILES used to generate tasks.
 
-        _logger.info(
-            'Successfully created segment and product tasks for order %s',
-            self.name
+        The ``segment_task_profile`` context key wins over the setting, so
+        bulk paths can force BULK_SEGMENT_TASK_PROFILE.
+        """
+        profile = self.env.context.get('segment_task_profile') or self.env[
+            'ir.config_parameter'].sudo().get_param(TASK_PROFILE_PARAM, 'standard')
+        if profile not in SEGMENT_TASK_PROFILES:
+            _logger.warning('Unknown segment task generation profile %r, using standard.', profile)
+            return 'standard'
+        return profile
+
+    def _post_segment_task_summary(self, project, created, archived):
+        """Log one message on the project instead of one per generated task."""
+        if not created and not archived:
+            return
+        project.message_post(
+            body=f'Tareas del pedido {self.name} sincronizadas: '
+                 f'{created} creadas, {archived} archivadas.',
+            subtype_xmlid='mail.mt_note',
         )
 
-    def _create_segment_tasks_recursive(self, segment, project, parent_task=None):
-        """Recursively create tasks for segment, its products, and child segments.
+    @contextmanager
+    def _hold_segment_task_lock(self):
+        """Hold the advisory lock guarding task generation for the whole block.
+
+        The lock is session-level so that it survives the progress commits of
+        background jobs. A failing block is rolled back (to a savepoint, or
+        entirely for auto-committing jobs) before the lock is released.
+
+        Yields:
+            bool: False when another session holds the lock of this order
+        """
+        if not self._try_lock_segment_tasks():
+            yield False
+            return
+        auto_commit = self.env.context.get('segment_task_auto_commit')
+        try:
+            with nullcontext() if auto_commit else self.env.cr.savepoint():
+                yield True
+        except Exception:
+            if auto_commit:
+                self.env.cr.rollback()
+            raise
+        finally:
+            self._release_segment_task_lock()
+
+    def _try_lock_segment_tasks(self):
+        """Take the session-level advisory lock guarding task generation.
+
+        Returns:
+            bool: False when another session holds the lock of this order
+        """
+        self.ensure_one()
+        self.env.cr.execute(SQL(
+            "SELECT pg_try_advisory_lock(%s, %s)",
+            SEGMENT_TASK_LOCK_NAMESPACE,
+            self.id,
+        ))
+        return self.env.cr.fetchone()[0]
+
+    def _release_segment_task_lock(self):
+        self.ensure_one()
+        self.env.cr.execute(SQL(
+            "SELECT pg_advisory_unlock(%s, %s)",
+            SEGMENT_TASK_LOCK_NAMESPACE,
+            self.id,
+        ))
+
+    def _prepare_segment_task_plan(self, project, existing=None):
+        """Build in memory the task tree mirroring the segments of this order.
+
+        The plan is a list of levels whose tasks are created together. Level N
+        holds the tasks of level-N segments and the product tasks of the
+        level N-1 segments, so the parent of every item sits in the previous
+        level.
 
         Args:
-            segment: sale.order.segment record
             project: project.project record
-            parent_task: project.task record (parent task) or None for root
+            existing: result of _get_existing_task_map, loaded if not given
 
         Returns:
-            project.task: created segment task or existing task
+            list of levels, each a list of dicts with:
+            - key: ('segment', segment_id) or ('line', line_id)
+            - parent_key: key of the parent item, None for root segment tasks
+            - segment: sale.order.segment record (segment of the line for products)
+            - line: sale.order.line record for product tasks, else None
+            - task: existing project.task, or None if it has to be created
+            - values: dict for project.task.create(), without parent_id
         """
-        # 1. Create or get segment task
-        existing_task = self.env['project.task'].search([
-            ('segment_id', '=', segment.id),
-            ('project_id', '=', project.id)
-        ], limit=1)
+        self.ensure_one()
+        if existing is None:
+            existing = self._get_existing_task_map(project)
+        # Product tasks follow their line when it moves to another segment
+        task_by_line = {line_id: task for (_segment_id, line_id), task in existing.items() if line_id}
+        plan = []
+        root_segments = self.segment_ids.filtered(lambda s: not s.parent_id)
+        segment_items = [
+            (segment, None) for segment in root_segments.sorted(key=lambda s: (s.sequence, s.id))
+        ]
+        product_items = []
+        while segment_items or product_items:
+            level = []
+            next_segment_items = []
+            next_product_items = []
+            for segment, parent_key in segment_items:
+                item = {
+                    'key': ('segment', segment.id),
+                    'parent_key': parent_key,
+                    'segment': segment,
+                    'line': None,
+                    'task': existing.get((segment.id, False)),
+                    'values': self._prepare_segment_task_values(segment, project),
+                }
+                level.append(item)
+                next_segment_items += [
+                    (child, item['key'])
+                    for child in segment.child_ids.sorted(key=lambda s: (s.sequence, s.id))
+                ]
+                for line in segment.line_ids:
+                    next_product_items.append({
+                        'key': ('line', line.id),
+                        'parent_key': item['key'],
+                        'segment': segment,
+                        'line': line,
+                        'task': existing.get((segment.id, line.id)) or task_by_line.get(line.id),
+                        'values': self._prepare_product_task_values(line, project),
+                    })
+            level += product_items
+            plan.append(level)
+            segment_items, product_items = next_segment_items, next_product_items
+        return plan
 
-        if existing_task:
-            _logger.debug(
-                'Task already exists for segment %s (task: %s), skipping creation',
-                segment.name,
-                existing_task.name
-            )
-            segment_task = existing_task
-        else:
-            # Prepare segment task values
-            task_values = {
-                'name': segment.name,
-                'project_id': project.id,
-                'segment_id': segment.id,
-                'partner_id': self.partner_id.id,
-                'company_id': self.company_id.id,
-                'sequence': segment.sequence,
-            }
+    def _get_existing_task_map(self, project):
+        """Load every segment and product task of this order in one query.
+
+        Archived tasks, and tasks of archived segments, are included so that
+        synchronisation can restore them.
+
+        Args:
+            project: project.project record
+
+        Returns:
+            dict: (segment_id, sale_line_id) -> project.task, where segment
+            tasks are keyed (segment_id, False) and product tasks
+            (segment_id of their parent task, sale_line_id).
+        """
+        self.ensure_one()
+        tasks = self.env['project.task'].with_context(active_test=False).search_fetch([
+            ('project_id', '=', project.id),
+            '|',
+            ('segment_id', 'in', self.with_context(active_test=False).segment_ids.ids),
+            ('sale_line_id', 'in', self.order_line.ids),
+        ], ['segment_id', 'is_segment_task', 'sale_line_id', *SEGMENT_TASK_SYNC_FIELDS])
+        existing = {}
+        segment_by_task = {}
+        # Generated tasks win over tasks the user linked to a segment by hand,
+        # active tasks over archived ones
+        segment_tasks = tasks.filtered('segment_id').sorted(
+            lambda t: (not t.is_segment_task, not t.active)
+        )
+        for task in segment_tasks:
+            existing.setdefault((task.segment_id.id, False), task)
+            segment_by_task[task.id] = task.segment_id.id
+        for task in tasks.filtered(lambda t: not t.segment_id and t.sale_line_id):
+            segment_id = segment_by_task.get(task.parent_id.id)
+            if segment_id:
+                existing.setdefault((segment_id, task.sale_line_id.id), task)
+        return existing
 
-            # Set parent if this is a child segment
-            if parent_task:
-                task_values['parent_id'] = parent_task.id
-
-            # Create segment task
-            segment_task = self._create_task_with_savepoint(task_values, segment)
-            if not segment_task:
-                return None
-
-        # 2. Create product subtasks (one per line_ids)
-        for line in segment.line_ids:
-            # Check if product task already exists
-            existing_product_task = self.env['project.task'].search([
-                ('name', '=', line.product_id.name),
-                ('parent_id', '=', segment_task.id),
-                ('project_id', '=', project.id),
-                ('sale_line_id', '=', line.id)
-            ], limit=1)
-
-            if existing_product_task:
-                _logger.debug(
-                    'Product task already exists for line %s, skipping',
-                    line.product_id.name
+    def _prepare_segment_task_values(self, segment, project):
+        """Return project.task values for a segment task (without parent_id)."""
+        return {
+            'name': segment.name,
+            'project_id': project.id,
+            'segment_id': segment.id,
+            'is_segment_task': True,
+            'partner_id': self.partner_id.id,
+            'company_id': self.company_id.id,
+            'sequence': segment.sequence,
+            'active': True,
+        }
+
+    def _prepare_product_task_values(self, line, project):
+        """Return project.task values for a product task (without parent_id)."""
+        values = {
+            'name': line.product_id.name,
+            'project_id': project.id,
+            'sale_line_id': line.id,
+            'allocated_hours': line.product_uom_qty,
+            'partner_id': self.partner_id.id,
+            'company_id': self.company_id.id,
+            'sequence': line.sequence,
+            'active': True,
+        }
+        # Add product description if exists
+        if line.name or line.product_id.description_sale:
+            values['description'] = line.name or line.product_id.description_sale
+        return values
+
+    def _execute_segment_task_plan(self, plan):
+        """Apply a plan level by level: create missing tasks, update the others.
+
+        Missing tasks are created in batches of SEGMENT_TASK_CREATE_BATCH per
+        level, reporting progress between batches. Existing tasks
+        that differ from the plan are written in one batch per distinct set
+        of changes. Items whose parent task could not be created are skipped
+        together with their whole subtree.
+
+        Returns:
+            dict: plan item key -> project.task (existing or created)
+        """
+        tasks = {}
+        for done, level in enumerate(plan):
+            self._report_segment_task_progress(done, len(plan))
+            to_create, to_write = self._diff_segment_task_level(level, tasks)
+            for changes, task_ids in to_write.items():
+                self.env['project.task'].browse(task_ids).write(dict(changes))
+            if to_write:
+                _logger.info(
+                    'Updated %d tasks in %d batches for order %s',
+                    sum(len(task_ids) for task_ids in to_write.values()),
+                    len(to_write),
+                    self.name
                 )
+            for start in range(0, len(to_create), SEGMENT_TASK_CREATE_BATCH):
+                if start:
+                    # Keep the heartbeat of background jobs fresh within long levels
+                    self._report_segment_task_progress(done + start / len(to_create), len(plan))
+                batch = to_create[start:start + SEGMENT_TASK_CREATE_BATCH]
+                for (item, values), task in zip(batch, self._create_task_level(batch)):
+                    if task:
+                        tasks[item['key']] = task
+        return tasks
+
+    def _diff_segment_task_level(self, level, tasks):
+        """Split one plan level into the tasks to create and the changes to write.
+
+        Args:
+            level: list of plan items (see _prepare_segment_task_plan)
+            tasks: dict plan item key -> project.task of the previous levels,
+                updated in place with the existing tasks of this level
+
+        Returns:
+            tuple: (list of (plan item, create values),
+                    dict sorted change items -> list of task ids)
+        """
+        to_create = []
+        to_write = defaultdict(list)
+        for item in level:
+            parent_task = tasks.get(item['parent_key']) if item['parent_key'] else None
+            if item['parent_key'] and not parent_task:
+                continue
+            values = dict(item['values'], parent_id=parent_task.id if parent_task else False)
+            if item['task']:
+                tasks[item['key']] = item['task']
+                changes = self._get_segment_task_changes(item['task'], values)
+                if changes:
+                    to_write[tuple(sorted(changes.items()))].append(item['task'].id)
                 continue
+            to_create.append((item, values))
+        return to_create, to_write
 
-            # Prepare product task values
-            product_task_values = {
-                'name': line.product_id.name,
-                'project_id': project.id,
-                'parent_id': segment_task.id,
-                'sale_line_id': line.id,
-                'allocated_hours': line.product_uom_qty,
-                'partner_id': self.partner_id.id,
-                'company_id': self.company_id.id,
-            }
+    def _get_segment_task_changes(self, task, values):
+        """Return the synchronised fields of ``values`` that differ on ``task``."""
+        changes = {}
+        for fname in SEGMENT_TASK_SYNC_FIELDS:
+            if fname not in values:
+                continue
+            current = task[fname]
+            if isinstance(current, models.BaseModel):
+                current = current.id
+            if current != values[fname]:
+                changes[fname] = values[fname]
+        return changes
 
-            # Add product description if exists
-            if line.name or line.product_id.description_sale:
-                product_task_values['description'] = line.name or line.product_id.description_sale
+    def _archive_obsolete_segment_tasks(self, plan, existing):
+        """Archive generated tasks whose segment or line left the tree.
 
-            # Create product task
-            self._create_task_with_savepoint(product_task_values, segment, is_product=True)
+        Only tasks this module generates are touched: flagged segment tasks
+        and product tasks. Tasks linked to a segment by hand are kept.
 
-        # 3. Recursively process child segments
-        for child_segment in segment.child_ids.sorted(key=lambda s: (s.sequence, s.id)):
-            self._create_segment_tasks_recursive(child_segment, project, parent_task=segment_task)
+        Returns:
+            project.task: the archived tasks
+        """
+        obsolete = self._get_obsolete_segment_tasks(plan, existing)
+        if obsolete:
+            obsolete.write({'active': False})
+            _logger.info(
+                'Archived %d obsolete segment tasks for order %s',
+                len(obsolete),
+                self.name
+            )
+        return obsolete
+
+    def _get_obsolete_segment_tasks(self, plan, existing):
+        """Return the active generated tasks that no plan item claims."""
+        planned = {item['task'] for level in plan for item in level if item['task']}
+        return self.env['project.task'].union(*(
+            task for task in existing.values()
+            if task not in planned and task.active and (task.is_segment_task or not task.segment_id)
+        ))
 
-        return segment_task
+    def _mark_segment_tasks_outdated(self):
+        """Flag confirmed orders for task synchronisation and wake up the cron."""
+        orders = self.filtered(lambda o: o.state == 'sale' and not o.segment_tasks_outdated)
+        if not orders:
+            return
+        orders.segment_tasks_outdated = True
+        self.env.ref('spora_segment.ir_cron_segment_task_sync')._trigger()
+
+    @api.model
+    def _cron_sync_segment_tasks(self):
+        """Synchronise the tasks of orders whose segments changed.
+
+        Orders are walked by id, each in its own transaction, so an order
+        that fails or is skipped is tried once per run and stays flagged for
+        the next one. The flag is only cleared by a successful sync.
+        """
+        domain = [('segment_tasks_outdated', '=', True), ('state', '=', 'sale')]
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        profile = self.env.context.get('segment_task_profile', BULK_SEGMENT_TASK_PROFILE)
+        synced = pending = 0
+        last_id = 0
+        while order := self.search(domain + [('id', '>', last_id)], order='id', limit=1):
+            last_id = order.id
+            try:
+                with self.env.cr.savepoint():
+                    done = order.with_context(segment_task_profile=profile)._create_segment_tasks()
+            except Exception:
+                _logger.exception('Segment task synchronisation failed for order %s', order.name)
+                done = False
+            if done:
+                synced += 1
+            else:
+                pending += 1
+            if auto_commit:
+                self.env.cr.commit()
+        if pending:
+            _logger.warning(
+                '%d orders could not be synchronised and remain flagged for the next run',
+                pending
+            )
+        self.env['ir.cron']._notify_progress(done=synced, remaining=0)
+
+    def _estimate_segment_task_plan(self):
+        """Dry run of _create_segment_tasks: plan the task tree, write nothing.
+
+        The plan and its diff against the existing tasks come from the same
+        methods as real generation, assuming every creation succeeds.
+
+        Returns:
+            dict with the segment/product task counts, the tasks already
+            present, the tasks to create/update/archive, the create batches,
+            the expected query count and the estimated duration in seconds
+        """
+        self.ensure_one()
+        cr = self.env.cr
+        queries_before = cr.sql_log_count
+        Task = self.env['project.task']
+        project = self._get_project()
+        existing = self._get_existing_task_map(project) if project else {}
+        plan = self._prepare_segment_task_plan(project, existing=existing)
+
+        tasks = {}
+        to_create_count = to_update_count = write_batches = create_batches = 0
+        for level in plan:
+            to_create, to_write = self._diff_segment_task_level(level, tasks)
+            for item, _values in to_create:
+                # Placeholder parent for the items of the next level
+                tasks[item['key']] = Task.new()
+            to_create_count += len(to_create)
+            create_batches += -(-len(to_create) // SEGMENT_TASK_CREATE_BATCH)
+            to_update_count += sum(len(task_ids) for task_ids in to_write.values())
+            write_batches += len(to_write)
+        to_archive_count = len(self._get_obsolete_segment_tasks(plan, existing))
+        planning_queries = cr.sql_log_count - queries_before
+
+        items = [item for level in plan for item in level]
+        expected_queries = (
+            planning_queries
+            + create_batches * ESTIMATE_QUERIES_PER_LEVEL
+            + to_create_count * ESTIMATE_QUERIES_PER_TASK
+            + (write_batches + bool(to_archive_count)) * ESTIMATE_QUERIES_PER_WRITE
+        )
+        estimated_seconds = round(expected_queries * ESTIMATE_SECONDS_PER_QUERY, 1)
+        return {
+            'segment_task_count': sum(1 for item in items if not item['line']),
+            'product_task_count': sum(1 for item in items if item['line']),
+            'existing_count': sum(1 for item in items if item['task']),
+            'to_create_count': to_create_count,
+            'to_update_count': to_update_count,
+            'to_archive_count': to_archive_count,
+            'create_batch_count': create_batches,
+            'expected_queries': expected_queries,
+            'estimated_seconds': estimated_seconds,
+            'recommend_async': estimated_seconds > ESTIMATE_ASYNC_THRESHOLD,
+        }
+
+    def action_export_segment_hierarchy(self, file_format='xlsx'):
+        """Download the segment tree of the selected orders as a single XLSX or CSV file."""
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f"/spora_segment/export/{file_format}?order_ids={','.join(map(str, self.ids))}",
+            'target': 'self',
+        }
+
+    def action_preview_segment_tasks(self):
+        """Show what task generation would do for this order, without doing it."""
+        self.ensure_one()
+        estimate = self._estimate_segment_task_plan()
+        message = (
+            f"Tareas de segmento: {estimate['segment_task_count']}, "
+            f"tareas de producto: {estimate['product_task_count']} "
+            f"({estimate['existing_count']} ya existen). "
+            f"Se crearían {estimate['to_create_count']} en {estimate['create_batch_count']} lotes, "
+            f"se actualizarían {estimate['to_update_count']} "
+            f"y se archivarían {estimate['to_archive_count']}. "
+            f"Consultas estimadas: {estimate['expected_queries']}, "
+            f"duración estimada: {estimate['estimated_seconds']} s."
+        )
+        if estimate['recommend_async']:
+            message += ' Se recomienda generar las tareas en segundo plano.'
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': f'Previsión de tareas - {self.name}',
+                'message': message,
+                'type': 'warning' if estimate['recommend_async'] else 'info',
+                'sticky': True,
+            },
+        }
+
+    def action_sync_segment_tasks(self):
+        """Mirror the current segments and lines on the project tasks now."""
+        for order in self.filtered(lambda o: o.state == 'sale'):
+            order._create_segment_tasks()
+
+    def _create_task_level(self, to_create):
+        """Create one plan level in a single batch, isolating records on failure.
+
+        Args:
+            to_create: list of (plan item, task values) pairs
+
+        Returns:
+            list: created project.task (or None when it failed), in input order
+        """
+        try:
+            tasks = self._create_tasks_batch([values for item, values in to_create])
+        except Exception as e:
+            _logger.warning(
+                'Batch creation of %d tasks failed for order %s (%s). '
+                'Retrying one task at a time.',
+                len(to_create),
+                self.name,
+                str(e)
+            )
+            return [
+                self._create_task_with_savepoint(values, item['segment'], is_product=bool(item['line']))
+                for item, values in to_create
+            ]
+        _logger.info(
+            'Created %d tasks in one batch for order %s',
+            len(tasks),
+            self.name
+        )
+        return list(tasks)
+
+    def _create_tasks_batch(self, vals_list):
+        """Create tasks in one call inside a savepoint. Raises on failure."""
+        with self.env.cr.savepoint():
+            return self.env['project.task'].create(vals_list)
 
     def _create_task_with_savepoint(self, task_values, segment, is_product=False):
         """Create task with savepoint isolation to prevent cascading failures.
@@ -352,6 +1133,13 @@ class SaleOrder(models.Model):
                         segment.level
                     )
                 return task
+        except UniqueViolation:
+            _logger.info(
+                'Task "%s" for segment "%s" was already created by a concurrent worker. Skipping.',
+                task_values.get('name', 'unknown'),
+                segment.name
+            )
+            return None
         except Exception as e:
             task_type = 'product' if is_product else 'segment'
             _logger.error(
@@ -367,6 +1155,9 @@ class SaleOrder(models.Model):
     def check_task_creation_conflicts(self):
         """Check for modules/configurations that may conflict with segment task creation.
 
+        Cheap enough to run on every confirmation: the underlying data is
+        cached per registry and version (see _get_task_creation_conflict_data).
+
         Returns:
             dict: {
                 'has_conflicts': bool,
@@ -374,44 +1165,26 @@ class SaleOrder(models.Model):
                 'warnings': list of warning messages,
             }
         """
-        conflicts = []
-        warnings = []
-
-        # Check for conflicting modules
-        conflicting_modules = [
-            'sale_project_task_custom',
-            'jumo_spora_project_task_from_sale',
-            'project_task_auto_create',
+        modules, tracking_count, sample_products = self._get_task_creation_conflict_data(
+            self._get_task_conflict_cache_version()
+        )
+        conflicts = [
+            {
+                'type': 'module',
+                'name': name,
+                'summary': summary,
+                'message': f'Module "{name}" may create tasks independently',
+            }
+            for name, summary in modules
         ]
-
-        installed_modules = self.env['ir.module.module'].search([
-            ('name', 'in', conflicting_modules),
-            ('state', '=', 'installed')
-        ])
-
-        if installed_modules:
-            for module in installed_modules:
-                conflicts.append({
-                    'type': 'module',
-                    'name': module.name,
-                    'summary': module.summary,
-                    'message': f'Module "{module.name}" may create tasks independently',
-                })
-
-        # Check for products with service_tracking enabled
-        products_with_tracking = self.env['product.product'].search([
-            ('type', '=', 'service'),
-            ('sale_ok', '=', True),
-            ('service_tracking', '!=', 'no'),
-        ])
-
-        if products_with_tracking:
+        warnings = []
+        if tracking_count:
             warnings.append({
                 'type': 'product_tracking',
-                'count': len(products_with_tracking),
-                'message': f'{len(products_with_tracking)} service products have service_tracking enabled. '
-                           f'This is normal - our module temporarily disables it during confirmation.',
-                'sample_products': products_with_tracking[:5].mapped('name'),
+                'count': tracking_count,
+                'message': f'{tracking_count} service products have service_tracking enabled. '
+                           f'This is normal - native task generation is skipped for orders with segments.',
+                'sample_products': list(sample_products),
             })
 
         return {
@@ -420,3 +1193,56 @@ class SaleOrder(models.Model):
             'conflicts': conflicts,
             'warnings': warnings,
         }
+
+    @api.model
+    def _get_task_conflict_cache_version(self):
+        # last_value stays at the start value on the first nextval: only
+        # is_called tells the fresh sequence and its first value apart
+        self.env.cr.execute(SQL(
+            "SELECT last_value + is_called::int FROM %s",
+            SQL.identifier(CONFLICT_CACHE_SEQUENCE),
+        ))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _invalidate_task_creation_conflict_data(self):
+        """Make the next conflict check recompute its data, in every worker.
+
+        The version is taken now for this transaction, and again once it is
+        committed: a worker recomputing in between would otherwise keep the
+        data from before the commit under the new version.
+        """
+        bump = SQL("SELECT nextval(%s)", CONFLICT_CACHE_SEQUENCE)
+        self.env.cr.execute(bump)
+        self.env.cr.postcommit.add(lambda: self.env.cr.execute(bump))
+
+    @api.model
+    @ormcache('self.env.lang', 'version')
+    def _get_task_creation_conflict_data(self, version):
+        """Return the data behind check_task_creation_conflicts, cached.
+
+        The registry is reloaded when modules are installed, which resets the
+        cache. Product changes affecting the count take a new ``version``
+        (see _invalidate_task_creation_conflict_data), which leaves the other
+        registry caches alone.
+
+        Returns:
+            tuple: ((name, summary) of installed conflicting modules,
+                    number of saleable service products with service_tracking,
+                    names of up to 5 of those products)
+        """
+        installed_modules = self.env['ir.module.module'].sudo().search_fetch([
+            ('name', 'in', CONFLICTING_TASK_MODULES),
+            ('state', '=', 'installed'),
+        ], ['name', 'summary'])
+        Product = self.env['product.product'].sudo()
+        tracking_domain = [
+            ('type', '=', 'service'),
+            ('sale_ok', '=', True),
+            ('service_tracking', '!=', 'no'),
+        ]
+        return (
+            tuple((module.name, module.summary) for module in installed_modules),
+            Product.search_count(tracking_domain),
+            tuple(Product.search_fetch(tracking_domain, ['name'], limit=5).mapped('name')),
+        )
@@ -1,6 +1,9 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 
+# Line fields mirrored on the generated product tasks
+TASK_SYNC_TRIGGER_FIELDS = {'segment_id', 'product_id', 'product_uom_qty', 'name', 'sequence'}
+
 
 class SaleOrderLine(models.Model):
     _inherit = 'sale.order.line'
@@ -13,6 +16,24 @@ class SaleOrderLine(models.Model):
         index=True,
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines.filtered('segment_id').order_id._mark_segment_tasks_outdated()
+        return lines
+
+    def write(self, vals):
+        if TASK_SYNC_TRIGGER_FIELDS.intersection(vals):
+            self.filtered('segment_id').order_id._mark_segment_tasks_outdated()
+        res = super().write(vals)
+        if 'segment_id' in vals:
+            self.filtered('segment_id').order_id._mark_segment_tasks_outdated()
+        return res
+
+    def unlink(self):
+        self.filtered('segment_id').order_id._mark_segment_tasks_outdated()
+        return super().unlink()
+
     @api.constrains('segment_id', 'order_id')
     def _check_segment_order(self):
         """Validate segment belongs to same order as line."""
@@ -27,3 +48,13 @@ class SaleOrderLine(models.Model):
                         line.order_id.name,
                     )
                 )
+
+    def _timesheet_service_generation(self):
+        """Skip native project/task generation for lines of segmented orders.
+
+        Orders with segments get their project and task tree from
+        sale.order._create_segment_tasks; letting sale_project generate them
+        too would create duplicated tasks outside the segment hierarchy.
+        """
+        native_lines = self.filtered(lambda line: not line.order_id.segment_ids)
+        return super(SaleOrderLine, native_lines)._timesheet_service_generation()
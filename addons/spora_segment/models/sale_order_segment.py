@@ -1,12 +1,45 @@
 import logging
+from collections import defaultdict
+from contextlib import contextmanager
 
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools import SQL, create_index, str2bool
 
 _logger = logging.getLogger(__name__)
 
 MAX_HIERARCHY_DEPTH = 4
 
+# Digits per outline level in outline_sort_key (up to 99999 siblings).
+OUTLINE_SORT_KEY_WIDTH = 5
+
+# Writing any of these fields can shift the outline numbering of an order.
+OUTLINE_TRIGGER_FIELDS = {'parent_id', 'sequence', 'active', 'order_id'}
+# Segment fields mirrored on the generated project tasks
+TASK_SYNC_TRIGGER_FIELDS = {'name', 'parent_id', 'sequence', 'active', 'order_id'}
+
+# Context key enabling the deferred hierarchy maintenance of _bulk_edit(),
+# and the cursor cache key holding what has to be done when it ends.
+BULK_EDIT_CONTEXT_KEY = 'segment_bulk_edit'
+BULK_EDIT_CACHE_KEY = 'spora_segment.bulk_edit'
+
+# ir.config_parameter toggling the sale.order.segment.closure table.
+CLOSURE_TABLE_PARAM = 'spora_segment.closure_table'
+
+
+def _descendant_depends(*fnames):
+    """Expand field names over every descendant level allowed by MAX_HIERARCHY_DEPTH.
+
+    _descendant_depends('subtotal') gives 'subtotal', 'child_ids.subtotal',
+    'child_ids.child_ids.subtotal', ... so that a change anywhere in a subtree
+    marks all its ancestors at once instead of cascading level by level.
+    """
+    paths = list(fnames)
+    for depth in range(1, MAX_HIERARCHY_DEPTH):
+        prefix = '.'.join(['child_ids'] * depth)
+        paths.extend('%s.%s' % (prefix, fname) for fname in fnames)
+    return paths
+
 
 class SaleOrderSegment(models.Model):
     _name = 'sale.order.segment'
@@ -14,7 +47,7 @@ class SaleOrderSegment(models.Model):
     _parent_name = 'parent_id'
     _parent_store = True
     _rec_name = 'name'
-    _order = 'outline_number, sequence, id'
+    _order = 'outline_sort_key, id'
 
     # --- Core fields ---
     name = fields.Char(
@@ -37,10 +70,18 @@ class SaleOrderSegment(models.Model):
     )
     outline_number = fields.Char(
         string='Nº',
-        compute='_compute_outline_number',
+        readonly=True,
+        copy=False,
+        help='Numeración automática tipo outline (1, 1.1, 1.2, etc.). '
+             'Maintained by _recompute_outline_numbers().',
+    )
+    outline_sort_key = fields.Char(
+        string='Outline Sort Key',
+        compute='_compute_outline_sort_key',
         store=True,
-        recursive=True,
-        help='Numeración automática tipo outline (1, 1.1, 1.2, etc.)',
+        index=True,
+        help='Fixed-width encoding of the outline number (e.g. 1.10 -> 0000100010) '
+             'so that a plain btree ordering follows the true outline order.',
     )
 
     # --- Hierarchy fields ---
@@ -92,7 +133,7 @@ class SaleOrderSegment(models.Model):
         compute='_compute_total',
         store=True,
         currency_field='currency_id',
-        help='Subtotal plus total of all child segments (recursive).',
+        help='Subtotal plus subtotals of all descendant segments.',
     )
 
     # --- Computed fields ---
@@ -132,32 +173,30 @@ class SaleOrderSegment(models.Model):
     product_list_preview = fields.Char(
         string='Products',
         compute='_compute_product_list_preview',
+        store=True,
+        translate=True,
         help='Preview of products assigned to this segment',
     )
 
+    def init(self):
+        super().init()
+        # Lets per-order segment lists paginate straight from the index
+        create_index(
+            self._cr,
+            'sale_order_segment_order_outline_idx',
+            self._table,
+            ['order_id', 'outline_sort_key', 'id'],
+        )
+
     # --- Computed methods ---
-    @api.depends('parent_id', 'parent_id.outline_number', 'sequence', 'order_id')
-    def _compute_outline_number(self):
-        """Calcula número outline basado en jerarquía y sequence."""
+    @api.depends('outline_number')
+    def _compute_outline_sort_key(self):
+        """Zero-pad every outline component so "2" sorts before "10"."""
         for segment in self:
-            if not segment.parent_id:
-                # Segmento raíz: contar posición entre hermanos raíz
-                siblings = segment.order_id.segment_ids.filtered(
-                    lambda s: not s.parent_id
-                ).sorted('sequence')
-                if segment.id in siblings.ids:
-                    position = siblings.ids.index(segment.id) + 1
-                    segment.outline_number = str(position)
-                else:
-                    segment.outline_number = '0'
-            else:
-                # Hijo: padre.número + "." + posición entre hermanos
-                siblings = segment.parent_id.child_ids.sorted('sequence')
-                if segment.id in siblings.ids:
-                    position = siblings.ids.index(segment.id) + 1
-                    segment.outline_number = f"{segment.parent_id.outline_number}.{position}"
-                else:
-                    segment.outline_number = '0.0'
+            parts = (segment.outline_number or '').split('.')
+            segment.outline_sort_key = ''.join(
+                part.zfill(OUTLINE_SORT_KEY_WIDTH) for part in parts if part.isdigit()
+            )
 
     @api.depends('parent_id', 'parent_id.level')
     def _compute_level(self):
@@ -202,33 +241,129 @@ class SaleOrderSegment(models.Model):
 
     @api.depends('line_ids.price_subtotal')
     def _compute_subtotal(self):
-        """Compute subtotal: sum of own order lines."""
+        """Compute subtotal: sum of own order lines, in one grouped query."""
+        segments = self.filtered('id')
+        subtotals = {}
+        if segments:
+            subtotals = {
+                segment.id: amount
+                for segment, amount in self.env['sale.order.line']._read_group(
+                    [('segment_id', 'in', segments.ids)],
+                    ['segment_id'],
+                    ['price_subtotal:sum'],
+                )
+            }
         for segment in self:
-            segment.subtotal = sum(segment.line_ids.mapped('price_subtotal'))
+            if segment.id:
+                segment.subtotal = subtotals.get(segment.id, 0.0)
+            else:
+                # New record (onchange): nothing in the database yet
+                segment.subtotal = sum(segment.line_ids.mapped('price_subtotal'))
 
-    @api.depends('subtotal', 'child_ids.total')
+    @api.depends(*_descendant_depends('subtotal', 'active'))
     def _compute_total(self):
-        """Compute total recursively: own subtotal + children totals."""
-        for segment in self:
-            children_total = sum(segment.child_ids.mapped('total'))
-            segment.total = segment.subtotal + children_total
+        """Compute total: own subtotal + subtotals of all active descendants.
 
-    @api.depends('line_ids.product_id')
-    def _compute_product_list_preview(self):
-        """Generate preview list of product names for display in tree view."""
+        Totals of the whole batch are rolled up in one aggregate query over
+        parent_path prefixes (see _get_rollup_totals), so a price change marks
+        and recomputes every ancestor at once.
+        """
+        segments = self.filtered('id')
+        totals = self._get_rollup_totals(segments.ids) if segments else {}
         for segment in self:
-            if not segment.line_ids:
-                segment.product_list_preview = ''
+            if segment.id:
+                segment.total = totals.get(segment.id, 0.0)
             else:
-                product_names = segment.line_ids.mapped('product_id.name')
-                if len(product_names) <= 3:
-                    segment.product_list_preview = ', '.join(product_names)
-                else:
-                    # Show first 3 products + count
-                    preview = ', '.join(product_names[:3])
-                    segment.product_list_preview = '%s... (+%d more)' % (
-                        preview, len(product_names) - 3
+                segment.total = segment.subtotal + sum(segment.child_ids.mapped('total'))
+
+    @api.depends('line_ids.product_id', 'line_ids.product_id.name')
+    def _compute_product_list_preview(self):
+        """Generate preview list of product names for display in tree view.
+
+        Stored, so the list view does not read every line and product on each
+        load. Lines of the whole batch are fetched in one query and product
+        names in one more per installed language, instead of one mapped() per
+        segment. The preview is translated: every language is computed, since
+        the stored value is shared by users of all languages.
+        """
+        product_ids = defaultdict(list)
+        segments = self.filtered('id')
+        if segments:
+            lines = self.env['sale.order.line'].search_fetch(
+                [('segment_id', 'in', segments.ids), ('product_id', '!=', False)],
+                ['segment_id', 'product_id'],
+            )
+            seen = set()
+            for line in lines:
+                key = (line.segment_id.id, line.product_id.id)
+                if key not in seen:
+                    seen.add(key)
+                    product_ids[line.segment_id.id].append(line.product_id.id)
+            langs = {code for code, _name in self.env['res.lang'].get_installed()}
+            langs.add(self.env.lang or 'en_US')
+            for lang in langs:
+                products = lines.product_id.with_context(lang=lang)
+                products.fetch(['name'])
+                for segment in segments.with_context(lang=lang):
+                    segment.product_list_preview = self._format_product_list_preview(
+                        products.browse(product_ids[segment.id]).mapped('name')
                     )
+        for segment in self - segments:
+            # New record (onchange): nothing in the database yet
+            segment.product_list_preview = self._format_product_list_preview(
+                segment.line_ids.mapped('product_id.name')
+            )
+
+    @api.model
+    def _format_product_list_preview(self, names):
+        if len(names) <= 3:
+            return ', '.join(names)
+        # Show first 3 products + count
+        return '%s... (+%d more)' % (', '.join(names[:3]), len(names) - 3)
+
+    def _get_rollup_totals(self, segment_ids):
+        """Return {segment_id: subtotal of the segment and its active descendants}.
+
+        Descendants below an archived segment are left out, matching what
+        child_ids (which hides archived records) used to sum. Uses the closure
+        table when enabled, parent_path prefixes otherwise; the prefix joins
+        stay within the segment's order so they use the order_id index.
+        """
+        self.flush_model(['subtotal', 'parent_path', 'active'])
+        if self._closure_enabled():
+            self.env.cr.execute(SQL("""
+                SELECT c.ancestor_id, COALESCE(SUM(d.subtotal), 0)
+                  FROM sale_order_segment_closure c
+                  JOIN sale_order_segment d ON d.id = c.descendant_id
+                 WHERE c.ancestor_id = ANY(%s)
+                   AND NOT EXISTS (
+                       SELECT 1
+                         FROM sale_order_segment_closure cx
+                         JOIN sale_order_segment x ON x.id = cx.ancestor_id
+                        WHERE cx.descendant_id = d.id
+                          AND cx.depth < c.depth
+                          AND NOT x.active
+                   )
+              GROUP BY c.ancestor_id
+            """, list(segment_ids)))
+        else:
+            self.env.cr.execute(SQL("""
+                SELECT a.id, COALESCE(SUM(d.subtotal), 0)
+                  FROM sale_order_segment a
+                  JOIN sale_order_segment d ON d.order_id = a.order_id
+                                           AND d.parent_path LIKE a.parent_path || '%%'
+                 WHERE a.id = ANY(%s)
+                   AND NOT EXISTS (
+                       SELECT 1
+                         FROM sale_order_segment x
+                        WHERE x.order_id = a.order_id
+                          AND NOT x.active
+                          AND x.parent_path LIKE a.parent_path || '_%%'
+                          AND d.parent_path LIKE x.parent_path || '%%'
+                   )
+              GROUP BY a.id
+            """, list(segment_ids)))
+        return dict(self.env.cr.fetchall())
 
     # --- Constraints ---
     @api.constrains('parent_id', 'order_id')
@@ -244,6 +379,12 @@ class SaleOrderSegment(models.Model):
     @api.constrains('parent_id')
     def _check_hierarchy(self):
         """Validate no circular references and max depth of 4 levels."""
+        pending = self._get_bulk_edit_pending()
+        if pending is not None:
+            # Validated once for the whole batch when the bulk edit ends
+            pending['segment_ids'].update(self.ids)
+            return
+
         # Step 1: Check circular references (Odoo 18 method)
         if self._has_cycle():
             raise ValidationError(
@@ -251,43 +392,505 @@ class SaleOrderSegment(models.Model):
                 'A segment cannot be its own ancestor.'
             )
 
-        # Step 2: Check depth limit for each segment
+        # Step 2: Check depth limit of each segment and of the subtree below
+        # it (prevents moving a deep subtree under a high-level parent).
+        # Depths of the whole batch come from parent_path in one query.
+        depths = self._get_hierarchy_depths()
         for segment in self:
-            # Walk UP to count depth of this segment
-            depth = 1
-            current = segment
-            while current.parent_id:
-                depth += 1
-                current = current.parent_id
-                if depth > MAX_HIERARCHY_DEPTH:
-                    raise ValidationError(
-                        'Error: Maximum hierarchy depth is %d levels. '
-                        'Segment "%s" would exceed this limit.'
-                        % (MAX_HIERARCHY_DEPTH, segment.name)
-                    )
-
-            # Step 3: Walk DOWN to check maximum depth of subtree
-            # This prevents moving a deep subtree under a high-level parent
-            max_child_depth = self._get_max_descendant_depth(segment)
-            if depth + max_child_depth > MAX_HIERARCHY_DEPTH:
+            depth, subtree_depth = depths.get(segment.id, (1, 0))
+            if depth > MAX_HIERARCHY_DEPTH:
+                raise ValidationError(
+                    'Error: Maximum hierarchy depth is %d levels. '
+                    'Segment "%s" would exceed this limit.'
+                    % (MAX_HIERARCHY_DEPTH, segment.name)
+                )
+            if depth + subtree_depth > MAX_HIERARCHY_DEPTH:
                 raise ValidationError(
                     'Error: Moving "%s" here would create hierarchy '
                     'of %d levels (max %d).' % (
                         segment.name,
-                        depth + max_child_depth,
+                        depth + subtree_depth,
                         MAX_HIERARCHY_DEPTH,
                     )
                 )
 
-    def _get_max_descendant_depth(self, segment):
-        """Return maximum depth of descendants below this segment."""
-        if not segment.child_ids:
-            return 0
-        return 1 + max(
-            self._get_max_descendant_depth(child)
-            for child in segment.child_ids
+    def _get_hierarchy_depths(self):
+        """Return {segment_id: (depth, subtree_depth)} for these segments.
+
+        depth is the level of the segment (1 for roots) and subtree_depth the
+        number of levels below it (0 for leaves). Both are derived from the
+        stored parent_path in a single query, archived descendants included.
+        """
+        if not self.ids:
+            return {}
+        self.flush_model(['parent_path'])
+        if self._closure_enabled():
+            self.env.cr.execute(SQL("""
+                SELECT s.id,
+                       (SELECT COUNT(*)
+                          FROM sale_order_segment_closure a
+                         WHERE a.descendant_id = s.id) AS depth,
+                       (SELECT COALESCE(MAX(d.depth), 0)
+                          FROM sale_order_segment_closure d
+                         WHERE d.ancestor_id = s.id) AS subtree_depth
+                  FROM sale_order_segment s
+                 WHERE s.id = ANY(%s)
+            """, self.ids))
+        else:
+            self.env.cr.execute(SQL("""
+                SELECT s.id,
+                       LENGTH(s.parent_path) - LENGTH(REPLACE(s.parent_path, '/', '')) AS depth,
+                       MAX(LENGTH(d.parent_path) - LENGTH(REPLACE(d.parent_path, '/', '')))
+                         - (LENGTH(s.parent_path) - LENGTH(REPLACE(s.parent_path, '/', ''))) AS subtree_depth
+                  FROM sale_order_segment s
+                  JOIN sale_order_segment d ON d.order_id = s.order_id
+                                           AND d.parent_path LIKE s.parent_path || '%%'
+                 WHERE s.id = ANY(%s)
+              GROUP BY s.id, s.parent_path
+            """, self.ids))
+        return {segment_id: (depth, subtree_depth) for segment_id, depth, subtree_depth in self.env.cr.fetchall()}
+
+    # --- Closure table ---
+    @api.model
+    def _closure_enabled(self):
+        """Return whether the ancestor/descendant closure table is maintained."""
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param(CLOSURE_TABLE_PARAM, 'False'))
+
+    def _parent_store_create(self):
+        res = super()._parent_store_create()
+        self._sync_closure()
+        return res
+
+    def _parent_store_update(self):
+        res = super()._parent_store_update()
+        self._sync_closure()
+        return res
+
+    def _sync_closure(self):
+        """Rewrite the closure rows of these segments and their subtrees."""
+        if not self.ids or not self._closure_enabled():
+            return
+        self._write_closure(SQL("""
+            SELECT DISTINCT d.id, d.parent_path
+              FROM sale_order_segment s
+              JOIN sale_order_segment d ON d.order_id = s.order_id
+                                       AND d.parent_path LIKE s.parent_path || '%%'
+             WHERE s.id = ANY(%s)
+        """, self.ids))
+
+    @api.model
+    def _rebuild_closure(self, order_ids=None):
+        """Rewrite the closure rows of the given orders (all orders by default)."""
+        if not self._closure_enabled():
+            return
+        if order_ids is None:
+            scope = SQL("SELECT id, parent_path FROM sale_order_segment")
+        else:
+            scope = SQL("SELECT id, parent_path FROM sale_order_segment WHERE order_id = ANY(%s)", list(order_ids))
+        self._write_closure(scope)
+
+    @api.model
+    def _clear_closure(self):
+        self.env.cr.execute(SQL("DELETE FROM sale_order_segment_closure"))
+        self.env['sale.order.segment.closure'].invalidate_model()
+
+    @api.model
+    def _write_closure(self, scope):
+        """Replace the closure rows of the segments returned by ``scope``.
+
+        Args:
+            scope: SQL query returning (id, parent_path) of the segments whose
+                ancestor rows must be rewritten.
+        """
+        self.flush_model(['parent_path'])
+        self.env.cr.execute(SQL("""
+            WITH scope AS (%s)
+            DELETE FROM sale_order_segment_closure c
+             USING scope
+             WHERE c.descendant_id = scope.id
+        """, scope))
+        # parent_path "12/34/56/" gives (12, 56, 2), (34, 56, 1), (56, 56, 0)
+        self.env.cr.execute(SQL("""
+            WITH scope AS (%s)
+            INSERT INTO sale_order_segment_closure (ancestor_id, descendant_id, depth)
+            SELECT a.ancestor_id::integer, scope.id, CARDINALITY(p.ids) - a.position
+              FROM scope
+             CROSS JOIN LATERAL (
+                   SELECT STRING_TO_ARRAY(RTRIM(scope.parent_path, '/'), '/') AS ids
+                   ) p
+             CROSS JOIN LATERAL UNNEST(p.ids) WITH ORDINALITY AS a(ancestor_id, position)
+        """, scope))
+        self.env['sale.order.segment.closure'].invalidate_model()
+
+    def _get_descendants(self):
+        """Return these segments and all their descendants, archived included."""
+        if not self.ids:
+            return self.browse()
+        if self._closure_enabled():
+            self.flush_model(['parent_path'])
+            self.env.cr.execute(SQL("""
+                SELECT DISTINCT descendant_id
+                  FROM sale_order_segment_closure
+                 WHERE ancestor_id = ANY(%s)
+            """, self.ids))
+            return self.browse([row[0] for row in self.env.cr.fetchall()])
+        return self.with_context(active_test=False).search([('id', 'child_of', self.ids)])
+
+    # --- Outline numbering ---
+    def _recompute_outline_numbers(self, order_ids):
+        """Renumber every segment of the given orders in a single pass.
+
+        One recursive query ranks siblings by (sequence, id) and builds the
+        outline top-down for the whole order. Only rows whose number actually
+        changed are written back. Inactive segments do not take a position
+        and are numbered 0 within their parent.
+        """
+        if not order_ids:
+            return
+        self.flush_model(['order_id', 'parent_id', 'sequence', 'active'])
+        self.env.cr.execute(SQL("""
+            WITH RECURSIVE ranked AS (
+                SELECT id, parent_id,
+                       CASE WHEN active THEN ROW_NUMBER() OVER (
+                           PARTITION BY order_id, parent_id, active
+                           ORDER BY sequence, id
+                       ) ELSE 0 END AS position
+                  FROM sale_order_segment
+                 WHERE order_id = ANY(%s)
+            ), outline AS (
+                -- Both terms must yield the same type: concatenation gives text
+                SELECT id, position::text AS number
+                  FROM ranked
+                 WHERE parent_id IS NULL
+                 UNION ALL
+                SELECT r.id, o.number || '.' || r.position
+                  FROM ranked r
+                  JOIN outline o ON o.id = r.parent_id
+            )
+            UPDATE sale_order_segment s
+               SET outline_number = o.number
+              FROM outline o
+             WHERE s.id = o.id
+               AND s.outline_number IS DISTINCT FROM o.number
+         RETURNING s.id
+        """, list(order_ids)))
+        self._outline_numbers_updated([row[0] for row in self.env.cr.fetchall()])
+
+    def _get_sibling_groups(self):
+        """Return the (order_id, parent_id) sibling groups of these segments."""
+        return {(segment.order_id.id, segment.parent_id.id) for segment in self}
+
+    def _renumber_sibling_groups(self, groups):
+        """Incrementally renumber the given sibling groups.
+
+        Each pass ranks only the siblings of the pending groups and writes the
+        rows whose number changed, i.e. the siblings after the edit point.
+        The next pass then descends into the children of those rows only, so
+        subtrees whose prefix did not change are never visited. The number of
+        passes is bounded by MAX_HIERARCHY_DEPTH.
+
+        Args:
+            groups: iterable of (order_id, parent_id) pairs, parent_id being
+                False for root segments.
+        """
+        order_ids = [order_id for order_id, parent_id in groups if order_id and not parent_id]
+        parent_ids = [parent_id for order_id, parent_id in groups if parent_id]
+        if not (order_ids or parent_ids):
+            return
+        self.flush_model(['order_id', 'parent_id', 'sequence', 'active', 'outline_number'])
+        updated_ids = []
+        while order_ids or parent_ids:
+            self.env.cr.execute(SQL("""
+                WITH ranked AS (
+                    SELECT id, parent_id,
+                           CASE WHEN active THEN ROW_NUMBER() OVER (
+                               PARTITION BY order_id, parent_id, active
+                               ORDER BY sequence, id
+                           ) ELSE 0 END AS position
+                      FROM sale_order_segment
+                     WHERE parent_id = ANY(%(parent_ids)s)
+                        OR (parent_id IS NULL AND order_id = ANY(%(order_ids)s))
+                ), numbered AS (
+                    SELECT r.id,
+                           CASE WHEN r.parent_id IS NULL THEN r.position::varchar
+                                ELSE p.outline_number || '.' || r.position
+                           END AS number
+                      FROM ranked r
+                 LEFT JOIN sale_order_segment p ON p.id = r.parent_id
+                )
+                UPDATE sale_order_segment s
+                   SET outline_number = n.number
+                  FROM numbered n
+                 WHERE s.id = n.id
+                   AND s.outline_number IS DISTINCT FROM n.number
+             RETURNING s.id
+            """, parent_ids=parent_ids, order_ids=order_ids))
+            changed_ids = [row[0] for row in self.env.cr.fetchall()]
+            updated_ids.extend(changed_ids)
+            order_ids, parent_ids = [], changed_ids
+        self._outline_numbers_updated(updated_ids)
+
+    def _outline_numbers_updated(self, segment_ids):
+        """Sync the ORM with outline numbers written directly in SQL."""
+        if not segment_ids:
+            return
+        segments = self.browse(segment_ids)
+        segments.invalidate_recordset(['outline_number'])
+        segments.modified(['outline_number'])
+
+    # --- Subtree moves ---
+    @api.model
+    def move_subtrees(self, segment_ids, new_parent=False, position=None):
+        """Move whole branches under ``new_parent`` in one batch.
+
+        Depth and cycles are validated once for all branches, parent_id,
+        parent_path and level of every moved segment are rewritten in a
+        single statement, and the outline is renumbered once.
+
+        Args:
+            segment_ids: ids (or recordset) of the branches to move. Segments
+                whose ancestor is moved as well simply follow it.
+            new_parent: id or record of the target parent, False to move the
+                branches to the root level of their order.
+            position: 0-based index among the target's children at which the
+                branches are inserted, in the given order. None appends them.
+
+        Returns:
+            sale.order.segment: the moved branch roots
+        """
+        segments = self.browse(segment_ids.ids if isinstance(segment_ids, models.BaseModel) else segment_ids)
+        new_parent = self.browse(new_parent.id if isinstance(new_parent, models.BaseModel) else new_parent or [])
+        segments = segments.exists()
+        if not segments:
+            return segments
+
+        # Branch roots keep the caller's order; descendants of moved segments follow them
+        moved_ids = set(segments.ids)
+        roots = segments.filtered(
+            lambda s: not moved_ids.intersection(int(x) for x in s.parent_path.split('/')[:-2])
         )
 
+        # The updates below are raw SQL: enforce the write rules up front on
+        # every segment they touch (descendants are listed bypassing the
+        # rules, so an unwritable one cannot be silently left out).
+        moved = roots.sudo()._get_descendants().sudo(False)
+        (moved | new_parent).check_access('write')
+
+        orders = roots.order_id | new_parent.order_id
+        if new_parent and roots.order_id != new_parent.order_id:
+            raise ValidationError(
+                'Error: Cannot set parent segment "%s" because it belongs '
+                'to a different sale order.' % new_parent.name
+            )
+        if len(orders) > 1:
+            raise UserError('Segments from different sale orders cannot be moved together.')
+        if new_parent and moved_ids.intersection(int(x) for x in new_parent.parent_path.split('/')[:-1]):
+            raise ValidationError(
+                'Error: You cannot create recursive segments. '
+                'A segment cannot be its own ancestor.'
+            )
+
+        new_prefix = new_parent.parent_path or ''
+        new_depth = new_prefix.count('/') + 1
+        depths = roots._get_hierarchy_depths()
+        for root in roots:
+            subtree_depth = depths[root.id][1]
+            if new_depth + subtree_depth > MAX_HIERARCHY_DEPTH:
+                raise ValidationError(
+                    'Error: Moving "%s" here would create hierarchy '
+                    'of %d levels (max %d).' % (
+                        root.name,
+                        new_depth + subtree_depth,
+                        MAX_HIERARCHY_DEPTH,
+                    )
+                )
+
+        old_groups = roots._get_sibling_groups()
+        self.flush_model()
+        # level is rewritten below together with parent_path: keep the ORM
+        # from recomputing it, but let it recompute full_path, child_depth,
+        # child_count and totals of the moved branches and old/new ancestors.
+        with self.env.protecting([self._fields['level']], moved):
+            roots.modified(['parent_id'], before=True)
+            self.env.cr.execute(SQL("""
+                UPDATE sale_order_segment d
+                   SET parent_path = %(new_prefix)s || SUBSTRING(d.parent_path FROM LENGTH(m.old_prefix) + 1),
+                       level = d.level + m.level_delta,
+                       parent_id = CASE WHEN d.id = m.id THEN %(parent_id)s ELSE d.parent_id END,
+                       write_uid = %(uid)s,
+                       write_date = %(now)s
+                  FROM (VALUES %(moves)s) AS m(id, old_prefix, level_delta)
+                 WHERE d.order_id = %(order_id)s
+                   AND d.parent_path LIKE m.old_prefix || m.id || '/%%'
+            """,
+                new_prefix=new_prefix,
+                parent_id=new_parent.id or None,
+                uid=self.env.uid,
+                now=self.env.cr.now(),
+                order_id=orders.id,
+                moves=SQL(', ').join(
+                    SQL('(%s, %s, %s)', root.id, root.parent_path[:-len('%s/' % root.id)],
+                        new_depth - root.parent_path.count('/'))
+                    for root in roots
+                ),
+            ))
+            self.invalidate_model(['parent_id', 'parent_path', 'level', 'child_ids', 'write_uid', 'write_date'])
+            roots.modified(['parent_id'])
+        roots._sync_closure()
+
+        roots._resequence_siblings(new_parent, position)
+        orders._mark_segment_tasks_outdated()
+        pending = self._get_bulk_edit_pending()
+        if pending is not None:
+            pending['order_ids'].update(orders.ids)
+        else:
+            self._renumber_sibling_groups(old_groups | roots._get_sibling_groups())
+        return roots
+
+    def _resequence_siblings(self, parent, position=None):
+        """Place these segments among the other children of ``parent``.
+
+        With no position they are appended after the current last sibling.
+        Otherwise the whole sibling list is renumbered 10, 20, ... and only
+        the sequences that actually change are written.
+        """
+        siblings = self.search([
+            ('order_id', '=', self.order_id.id),
+            ('parent_id', '=', parent.id),
+            ('id', 'not in', self.ids),
+        ]).sorted(lambda s: (s.sequence, s.id))
+        if position is None:
+            start = max(siblings.mapped('sequence'), default=0)
+            sequences = {segment.id: start + 10 * index for index, segment in enumerate(self, 1)}
+        else:
+            ordered = list(siblings)
+            ordered[position:position] = list(self)
+            sequences = {segment.id: 10 * index for index, segment in enumerate(ordered, 1)}
+        changed = {sid: seq for sid, seq in sequences.items() if self.browse(sid).sequence != seq}
+        if not changed:
+            return
+        changed_segments = self.browse(list(changed))
+        changed_segments.check_access('write')
+        self.env.cr.execute(SQL("""
+            UPDATE sale_order_segment s
+               SET sequence = v.sequence,
+                   write_uid = %s,
+                   write_date = %s
+              FROM (VALUES %s) AS v(id, sequence)
+             WHERE s.id = v.id
+        """, self.env.uid, self.env.cr.now(),
+            SQL(', ').join(SQL('(%s, %s)', sid, seq) for sid, seq in changed.items())))
+        changed_segments.invalidate_recordset(['sequence', 'write_uid', 'write_date'])
+        changed_segments.modified(['sequence'])
+
+    # --- Bulk edit mode ---
+    @contextmanager
+    def _bulk_edit(self):
+        """Defer hierarchy maintenance of segments until the block exits.
+
+        Usage::
+
+            with self.env['sale.order.segment']._bulk_edit() as Segment:
+                Segment.create(vals_list)
+                ...
+
+        Inside the block, outline renumbering and the hierarchy constraint are
+        skipped, and the stored hierarchy computes (level, full_path,
+        child_depth, total, ...) stay pending in the ORM instead of being
+        forced after every create/write. When the outermost block exits, the
+        pending computes are flushed in one batch, each affected order is
+        renumbered once and every touched segment is validated once.
+        """
+        bulk_self = self.with_context(**{BULK_EDIT_CONTEXT_KEY: True})
+        if BULK_EDIT_CACHE_KEY in self.env.cr.cache:
+            # Nested block: the outermost one does the flush
+            yield bulk_self
+            return
+        pending = self.env.cr.cache[BULK_EDIT_CACHE_KEY] = {
+            'order_ids': set(),
+            'segment_ids': set(),
+        }
+        try:
+            yield bulk_self
+        finally:
+            self.env.cr.cache.pop(BULK_EDIT_CACHE_KEY, None)
+        self._flush_bulk_edit(pending)
+
+    def _get_bulk_edit_pending(self):
+        """Return the pending work of the current bulk edit, or None."""
+        if not self.env.context.get(BULK_EDIT_CONTEXT_KEY):
+            return None
+        return self.env.cr.cache.get(BULK_EDIT_CACHE_KEY)
+
+    def _flush_bulk_edit(self, pending):
+        """Apply the hierarchy maintenance deferred by _bulk_edit()."""
+        self = self.with_context(**{BULK_EDIT_CONTEXT_KEY: False})
+        # Level/full_path (top-down) and child_depth/total (bottom-up) are
+        # recomputed by the ORM in one batch per field and tree level.
+        self.flush_model()
+        self._recompute_outline_numbers(list(pending['order_ids']))
+        self.browse(pending['segment_ids']).exists()._check_hierarchy()
+
+    @api.model
+    def load(self, fields, data):
+        """Imports run in bulk edit mode.
+
+        The hierarchy maintenance deferred to the end of the import (outline
+        renumbering and hierarchy check) may fail after every row was loaded:
+        the failure is reported as an import error, like row errors, and the
+        whole import is rolled back.
+        """
+        try:
+            with self.env.cr.savepoint(), self._bulk_edit() as segments:
+                return super(SaleOrderSegment, segments).load(fields, data)
+        except Exception as e:
+            if not isinstance(e, ValidationError):
+                _logger.exception('Segment import failed while finishing the bulk edit')
+            return {
+                'ids': False,
+                'messages': [{'type': 'error', 'message': str(e), 'record': False}],
+                'nextrow': 0,
+            }
+
+    # --- CRUD overrides ---
+    @api.model_create_multi
+    def create(self, vals_list):
+        segments = super().create(vals_list)
+        segments.order_id._mark_segment_tasks_outdated()
+        pending = self._get_bulk_edit_pending()
+        if pending is not None:
+            pending['order_ids'].update(segments.order_id.ids)
+        else:
+            self._renumber_sibling_groups(segments._get_sibling_groups())
+        return segments
+
+    def write(self, vals):
+        if TASK_SYNC_TRIGGER_FIELDS.intersection(vals):
+            self.order_id._mark_segment_tasks_outdated()
+        if not OUTLINE_TRIGGER_FIELDS.intersection(vals):
+            return super().write(vals)
+        pending = self._get_bulk_edit_pending()
+        if pending is not None:
+            pending['order_ids'].update(self.order_id.ids)
+            res = super().write(vals)
+            pending['order_ids'].update(self.order_id.ids)
+            return res
+        groups = self._get_sibling_groups()
+        res = super().write(vals)
+        self._renumber_sibling_groups(groups | self._get_sibling_groups())
+        return res
+
+    def unlink(self):
+        self.order_id._mark_segment_tasks_outdated()
+        pending = self._get_bulk_edit_pending()
+        if pending is not None:
+            pending['order_ids'].update(self.order_id.ids)
+            return super().unlink()
+        groups = self._get_sibling_groups()
+        res = super().unlink()
+        self._renumber_sibling_groups(groups)
+        return res
+
     # --- Display name ---
     def _compute_display_name(self):
         """Display as 'SO001 / 1.1. Segment Name' for better identification in task form."""
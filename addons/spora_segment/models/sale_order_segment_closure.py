@@ -0,0 +1,40 @@
+from odoo import models, fields
+
+
+class SaleOrderSegmentClosure(models.Model):
+    """Ancestor/descendant closure of sale.order.segment.
+
+    One row per (ancestor, descendant) pair, including the (segment, segment)
+    pair at depth 0. Rows are maintained in SQL by sale.order.segment while
+    the closure table setting is enabled, and removed by the database when a
+    segment is deleted.
+    """
+    _name = 'sale.order.segment.closure'
+    _description = 'Sale Order Segment Closure'
+    _log_access = False
+    _order = 'ancestor_id, depth'
+
+    ancestor_id = fields.Many2one(
+        'sale.order.segment',
+        string='Ancestor',
+        required=True,
+        index=True,
+        ondelete='cascade',
+    )
+    descendant_id = fields.Many2one(
+        'sale.order.segment',
+        string='Descendant',
+        required=True,
+        index=True,
+        ondelete='cascade',
+    )
+    depth = fields.Integer(
+        string='Depth',
+        required=True,
+        help='Number of levels between ancestor and descendant (0 = same segment).',
+    )
+
+    _sql_constraints = [
+        ('ancestor_descendant_uniq', 'unique(ancestor_id, descendant_id)',
+         'A segment pair can only appear once in the closure table.'),
+    ]
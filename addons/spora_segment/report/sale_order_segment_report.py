@@ -0,0 +1,303 @@
+import hashlib
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import accumulate
+
+from odoo import models, api
+from odoo.tools import SQL
+from odoo.tools.misc import formatLang
+
+# Left padding, in pixels, per hierarchy level in the report table
+INDENT_STEP = 15
+# Bump when the report output changes in a way the digest does not capture
+SEGMENT_REPORT_LAYOUT_VERSION = 3
+# Rows per HTML chunk when large reports are rendered in parallel (a few pages)
+SEGMENT_REPORT_CHUNK_ROWS = 250
+# Depth of the summary report when none is chosen: root segments and children
+SUMMARY_DEFAULT_DEPTH = 2
+# Cursor cache key of the rows built once for all the chunks of a report
+PREBUILT_ROWS_CACHE_KEY = 'spora_segment.report_rows'
+
+
+class ReportSaleOrderSegment(models.AbstractModel):
+    _name = 'report.spora_segment.report_saleorder_document_segment'
+    _description = 'Hierarchical Budget Report'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        """Report values; ``data['segment_row_range']`` renders one chunk of rows.
+
+        A chunk carries the running total of the rows before it and after
+        it, so that totals stay continuous once the chunks are merged.
+        """
+        docs = self.env['sale.order'].browse(docids)
+        row_data = self._get_prebuilt_segment_rows(docs)
+        segment_rows = {}
+        segment_chunks = {}
+        row_range = (data or {}).get('segment_row_range')
+        for doc in docs:
+            rows, running = row_data[doc.id]
+            start, end = row_range or (0, len(rows))
+            segment_rows[doc.id] = rows[start:end]
+            segment_chunks[doc.id] = {
+                'first': start == 0,
+                'last': end >= len(rows),
+                'carried_in': self._format_running_total(doc, running[start]) if start else '',
+                'carried_out': self._format_running_total(doc, running[end]) if end < len(rows) else '',
+            }
+        return {
+            'doc_ids': docids,
+            'doc_model': 'sale.order',
+            'docs': docs,
+            'segment_rows': segment_rows,
+            'segment_chunks': segment_chunks,
+        }
+
+    def _format_running_total(self, order, amount):
+        return formatLang(self.env, amount, currency_obj=order.currency_id)
+
+    @contextmanager
+    def _prebuild_segment_rows(self, orders):
+        """Build the rows of the orders once for every render inside the block.
+
+        The chunks of a large report are rendered one HTML document at a
+        time; each render reads the rows built here instead of flattening
+        the whole order again.
+
+        Yields:
+            dict: order id -> list of row dicts (see _get_segment_rows)
+        """
+        prebuilt = self.env.cr.cache.setdefault(PREBUILT_ROWS_CACHE_KEY, {})
+        rows = self._get_segment_rows(orders)
+        keys = {order_id: (self._name, self.env.lang, order_id) for order_id in rows}
+        for order_id, key in keys.items():
+            prebuilt[key] = (rows[order_id], list(accumulate((row['amount'] for row in rows[order_id]), initial=0)))
+        try:
+            yield rows
+        finally:
+            for key in keys.values():
+                prebuilt.pop(key, None)
+
+    def _get_prebuilt_segment_rows(self, orders):
+        """Return {order id: (rows, running totals)}, built now unless prebuilt.
+
+        running[i] is the sum of the amounts of rows[:i].
+        """
+        prebuilt = self.env.cr.cache.get(PREBUILT_ROWS_CACHE_KEY, {})
+        keys = {order.id: (self._name, self.env.lang, order.id) for order in orders}
+        if all(key in prebuilt for key in keys.values()):
+            return {order_id: prebuilt[key] for order_id, key in keys.items()}
+        return {
+            order_id: (rows, list(accumulate((row['amount'] for row in rows), initial=0)))
+            for order_id, rows in self._get_segment_rows(orders).items()
+        }
+
+    @api.model
+    def _get_row_chunks(self, order, chunk_rows=None, rows=None):
+        """Split the rows of an order into (start, end) ranges of about chunk_rows.
+
+        A range never ends on a segment row, so a segment heading is always
+        printed on the same chunk as its first line. ``rows`` are built
+        when not given.
+        """
+        chunk_rows = chunk_rows or SEGMENT_REPORT_CHUNK_ROWS
+        if rows is None:
+            rows = self._get_segment_rows(order)[order.id]
+        chunks = []
+        start = 0
+        while start < len(rows):
+            end = min(start + chunk_rows, len(rows))
+            while end < len(rows) and end - 1 > start and rows[end - 1]['type'] == 'segment':
+                end -= 1
+            chunks.append((start, end))
+            start = end
+        return chunks
+
+    @api.model
+    def _get_segment_rows(self, orders, max_depth=None):
+        """Flatten the segment tree of each order into pre-formatted table rows.
+
+        Segments and lines of all orders are read with a fixed number of
+        queries, whatever the size of the budgets. Rows come in outline
+        order: each segment, then its lines, then its children.
+
+        With ``max_depth``, only the items at depth 1 (root segments) to
+        max_depth are read: a line sits one level below its segment, and
+        collapsed segments show their stored total.
+
+        Returns:
+            dict: order id -> list of row dicts with keys type ('segment' or
+            'line'), outline, indent (px), label, description, qty,
+            price_unit and total (formatted strings, empty when not shown),
+            and amount (line subtotal as a number, 0 for segments)
+        """
+        segment_domain = [('order_id', 'in', orders.ids)]
+        if max_depth:
+            segment_domain.append(('level', '<=', max_depth))
+        segments = self.env['sale.order.segment'].search_fetch(
+            segment_domain,
+            ['order_id', 'parent_id', 'outline_number', 'name', 'level', 'total', 'currency_id'],
+            order='outline_sort_key, id',
+        )
+        line_segments = segments.filtered(lambda s: s.level < max_depth) if max_depth else segments
+        lines = self.env['sale.order.line'].search_fetch(
+            [('segment_id', 'in', line_segments.ids)],
+            ['segment_id', 'name', 'product_id', 'product_uom_qty', 'product_uom',
+             'price_unit', 'price_subtotal', 'currency_id'],
+            order='sequence, id',
+        )
+        lines.product_id.fetch(['name'])
+        if show_uom := self.env.user.has_group('uom.group_uom'):
+            lines.product_uom.fetch(['name'])
+
+        children = defaultdict(list)
+        for segment in segments:
+            children[segment.parent_id.id or ('root', segment.order_id.id)].append(segment)
+        lines_by_segment = defaultdict(list)
+        for line in lines:
+            lines_by_segment[line.segment_id.id].append(line)
+
+        rows = {}
+        for order in orders:
+            order_rows = rows[order.id] = []
+            stack = list(reversed(children[('root', order.id)]))
+            while stack:
+                segment = stack.pop()
+                order_rows.append(self._prepare_segment_row(segment))
+                order_rows.extend(
+                    self._prepare_line_row(line, segment.level + 1, show_uom)
+                    for line in lines_by_segment[segment.id]
+                )
+                stack.extend(reversed(children[segment.id]))
+        return rows
+
+    def _prepare_segment_row(self, segment):
+        return {
+            'type': 'segment',
+            'outline': segment.outline_number or '',
+            'indent': segment.level * INDENT_STEP,
+            'label': segment.name,
+            'description': '',
+            'qty': '',
+            'price_unit': '',
+            'total': formatLang(self.env, segment.total, currency_obj=segment.currency_id),
+            'amount': 0.0,
+        }
+
+    def _prepare_line_row(self, line, level, show_uom):
+        product_name = line.product_id.name
+        qty = formatLang(self.env, line.product_uom_qty, dp='Product Unit of Measure')
+        if show_uom:
+            qty = f'{qty} {line.product_uom.name}'
+        return {
+            'type': 'line',
+            'outline': '',
+            'indent': level * INDENT_STEP,
+            'label': product_name,
+            'description': line.name if line.name != product_name else '',
+            'qty': qty,
+            'price_unit': formatLang(self.env, line.price_unit, currency_obj=line.currency_id),
+            'total': formatLang(self.env, line.price_subtotal, currency_obj=line.currency_id),
+            'amount': line.price_subtotal,
+        }
+
+    @api.model
+    def _get_report_digests(self, orders):
+        """Fingerprint the printed content of each order.
+
+        The rows themselves are not built: segments and lines are summed up
+        per order (count, last write, printed amounts), along with the last
+        write of their products and units, the header fields, the language,
+        the company layout and the report templates. Any change that would
+        alter the PDF yields a new digest.
+
+        Returns:
+            dict: order id -> hex digest
+        """
+        fingerprints = self._get_content_fingerprints(orders)
+        View = self.env['ir.ui.view'].sudo()
+        templates = View.search_fetch(
+            [('key', 'in', [self._name.removeprefix('report.'), 'web.external_layout'])],
+            ['write_date'],
+        )
+        layout_version = [
+            SEGMENT_REPORT_LAYOUT_VERSION,
+            self.env.lang,
+            self.env.user.has_group('uom.group_uom'),
+            sorted(str(date) for date in templates.mapped('write_date')),
+        ]
+        digests = {}
+        for order in orders:
+            company = order.company_id
+            payload = {
+                'layout': layout_version,
+                'company': [company.id, str(company.write_date), company.external_report_layout_id.key],
+                'order': [
+                    order.name, order.partner_id.name, order.partner_id.email, order.partner_id.phone,
+                    str(order.date_order), str(order.validity_date), order.state, order.note,
+                    order.amount_total, order.currency_id.name,
+                ],
+                'content': fingerprints.get(order.id),
+            }
+            digests[order.id] = hashlib.sha256(
+                json.dumps(payload, sort_keys=True, default=str).encode()
+            ).hexdigest()
+        return digests
+
+    @api.model
+    def _get_content_fingerprints(self, orders):
+        """Return {order id: aggregates of its segments and segment lines}, in one query."""
+        self.env['sale.order.segment'].flush_model()
+        self.env['sale.order.line'].flush_model()
+        self.env.cr.execute(SQL("""
+            SELECT o.id,
+                   s.segment_count, s.segment_write, s.segment_total,
+                   l.line_count, l.line_write, l.line_qty, l.line_price, l.line_subtotal,
+                   l.product_write, l.uom_write
+              FROM sale_order o
+              LEFT JOIN LATERAL (
+                    SELECT COUNT(*) AS segment_count,
+                           MAX(write_date) AS segment_write,
+                           SUM(total) AS segment_total
+                      FROM sale_order_segment
+                     WHERE order_id = o.id
+                   ) s ON TRUE
+              LEFT JOIN LATERAL (
+                    SELECT COUNT(*) AS line_count,
+                           MAX(line.write_date) AS line_write,
+                           SUM(line.product_uom_qty) AS line_qty,
+                           SUM(line.price_unit) AS line_price,
+                           SUM(line.price_subtotal) AS line_subtotal,
+                           MAX(tmpl.write_date) AS product_write,
+                           MAX(uom.write_date) AS uom_write
+                      FROM sale_order_line line
+                      LEFT JOIN product_product product ON product.id = line.product_id
+                      LEFT JOIN product_template tmpl ON tmpl.id = product.product_tmpl_id
+                      LEFT JOIN uom_uom uom ON uom.id = line.product_uom
+                     WHERE line.order_id = o.id
+                       AND line.segment_id IS NOT NULL
+                   ) l ON TRUE
+             WHERE o.id = ANY(%s)
+        """, orders.ids))
+        return {row[0]: [str(value) for value in row[1:]] for row in self.env.cr.fetchall()}
+
+
+class ReportSaleOrderSegmentSummary(models.AbstractModel):
+    _name = 'report.spora_segment.report_saleorder_document_segment_summary'
+    _inherit = 'report.spora_segment.report_saleorder_document_segment'
+    _description = 'Hierarchical Budget Summary Report'
+
+    @api.model
+    def _get_segment_rows(self, orders, max_depth=None):
+        return super()._get_segment_rows(orders, max_depth=max_depth or self._get_summary_depth())
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        depth = (data or {}).get('max_depth')
+        report = self.with_context(segment_report_max_depth=depth) if depth else self
+        return super(ReportSaleOrderSegmentSummary, report)._get_report_values(docids, data=data)
+
+    @api.model
+    def _get_summary_depth(self):
+        return self.env.context.get('segment_report_max_depth') or SUMMARY_DEFAULT_DEPTH
@@ -6,3 +6,10 @@ from . import test_ux_enhancements
 from . import test_project_task_filtering
 from . import test_no_duplicate_tasks
 from . import test_outline_numbering
+from . import test_segment_closure
+from . import test_segment_move
+from . import test_segment_task_job
+from . import test_bulk_confirm
+from . import test_segment_task_sync
+from . import test_segment_report
+from . import test_segment_export
@@ -20,10 +20,18 @@ import logging
 from unittest.mock import patch
 from odoo.tests import TransactionCase, tagged
 from odoo.exceptions import UserError
+from odoo.tools import mute_logger
+
+from odoo.addons.spora_segment.models.sale_order import SEGMENT_TASK_LOCK_NAMESPACE
 
 _logger = logging.getLogger(__name__)
 
 
+def mock_create_batch_failure(self_order, vals_list):
+    """Simulate a failing batched create() to exercise the per-task fallback."""
+    raise UserError('Simulated batch failure')
+
+
 @tagged('post_install', '-at_install')
 class TestAutomatedTaskCreation(TransactionCase):
     """Test automatic task creation from segments when confirming sale orders."""
@@ -473,13 +481,15 @@ class TestAutomatedTaskCreation(TransactionCase):
         # Mock _create_task_with_savepoint to fail for one segment
         original_method = self.order._create_task_with_savepoint
 
-        def mock_create_task(self_order, task_values, segment):
+        def mock_create_task(self_order, task_values, segment, is_product=False):
             if segment.id == self.segment_level2.id:
                 # Simulate failure for level 2
                 return None
-            return original_method(task_values, segment)
+            return original_method(task_values, segment, is_product=is_product)
 
-        with patch.object(type(self.order), '_create_task_with_savepoint', mock_create_task):
+        # Fail every batch so that each level falls back to per-task savepoints
+        with patch.object(type(self.order), '_create_tasks_batch', mock_create_batch_failure), \
+                patch.object(type(self.order), '_create_task_with_savepoint', mock_create_task):
             self.order.action_confirm()
             project = self.order._get_project()
 
@@ -504,14 +514,15 @@ class TestAutomatedTaskCreation(TransactionCase):
         # Mock to return None (simulating exception caught internally)
         original_method = self.order._create_task_with_savepoint
 
-        def mock_create_task(self_order, task_values, segment):
+        def mock_create_task(self_order, task_values, segment, is_product=False):
             if segment.id == self.segment_level3.id:
                 # Simulate failure by returning None (as _create_task_with_savepoint does on exception)
                 _logger.error(f"Failed to create task for segment \"{segment.name}\": Test failure")
                 return None
-            return original_method(task_values, segment)
+            return original_method(task_values, segment, is_product=is_product)
 
-        with patch.object(type(self.order), '_create_task_with_savepoint', mock_create_task):
+        with patch.object(type(self.order), '_create_tasks_batch', mock_create_batch_failure), \
+                patch.object(type(self.order), '_create_task_with_savepoint', mock_create_task):
             # Should not raise exception (errors caught and logged)
             with self.assertLogs('odoo.addons.spora_segment.tests.test_automated_task_creation', level='ERROR') as log:
                 self.order.action_confirm()
@@ -522,6 +533,22 @@ class TestAutomatedTaskCreation(TransactionCase):
                     'Error should be logged for failed task creation'
                 )
 
+    def test_tasks_created_one_batch_per_level(self):
+        """Tasks are created with one batched create() per tree level."""
+        original_method = type(self.order)._create_tasks_batch
+        batch_sizes = []
+
+        def spy_create_batch(self_order, vals_list):
+            batch_sizes.append(len(vals_list))
+            return original_method(self_order, vals_list)
+
+        with patch.object(type(self.order), '_create_tasks_batch', spy_create_batch):
+            self.order.action_confirm()
+
+        # L1: 2 roots | L2: 1 segment + 2 products | L3: 1 + 1 | L4: 1 + 1 | L5: 1 product
+        self.assertEqual(batch_sizes, [2, 3, 2, 2, 1],
+                         'Each level should be created in a single batch')
+
     # --- Idempotence (3 tests) ---
 
     def test_reconfirm_no_duplicates(self):
@@ -605,6 +632,195 @@ class TestAutomatedTaskCreation(TransactionCase):
         self.assertEqual(task.allocated_hours, original_hours,
                          'Task hours should not change on re-confirm')
 
+    def test_existing_task_map_keys(self):
+        """Existing tasks are loaded once, keyed by (segment_id, sale_line_id)."""
+        self.order.action_confirm()
+        project = self.order._get_project()
+
+        existing = self.order._get_existing_task_map(project)
+
+        segment_task = existing[(self.segment_root1.id, False)]
+        self.assertEqual(segment_task.segment_id, self.segment_root1)
+        product_task = existing[(self.segment_root1.id, self.line_root1.id)]
+        self.assertEqual(product_task.parent_id, segment_task)
+        self.assertEqual(len(existing), 10, '5 segment tasks + 5 product tasks')
+
+    def test_rerun_only_creates_missing_tasks(self):
+        """Re-running generation recreates only the tasks that are missing."""
+        self.order.action_confirm()
+        project = self.order._get_project()
+        all_tasks = self.Task.search([('project_id', '=', project.id)])
+        root2_task = all_tasks.filtered(lambda t: t.segment_id == self.segment_root2)
+        root2_product_task = all_tasks.filtered(lambda t: t.parent_id == root2_task)
+        kept_ids = set((all_tasks - root2_task - root2_product_task).ids)
+
+        root2_product_task.unlink()
+        root2_task.unlink()
+        self.order._create_segment_tasks()
+
+        new_tasks = self.Task.search([('project_id', '=', project.id)])
+        self.assertEqual(len(new_tasks), len(all_tasks), 'Missing tasks should be recreated once')
+        self.assertTrue(kept_ids <= set(new_tasks.ids), 'Existing tasks should be kept as is')
+
+    def test_estimate_plan_writes_nothing(self):
+        """The dry run reports the plan of a draft order without creating anything."""
+        task_count = self.Task.search_count([])
+        estimate = self.order._estimate_segment_task_plan()
+
+        self.assertEqual(estimate['segment_task_count'], 5)
+        self.assertEqual(estimate['product_task_count'], 5)
+        self.assertEqual(estimate['existing_count'], 0)
+        self.assertEqual(estimate['to_create_count'], 10)
+        self.assertEqual(estimate['create_batch_count'], 5)
+        self.assertGreater(estimate['expected_queries'], 0)
+        self.assertEqual(self.Task.search_count([]), task_count)
+        self.assertFalse(self.order._get_project())
+
+    def test_estimate_matches_generation(self):
+        """Estimated creations match real generation, and nothing is left after it."""
+        estimate = self.order._estimate_segment_task_plan()
+        self.order.action_confirm()
+        project = self.order._get_project()
+        generated = self.Task.search_count([('project_id', '=', project.id)])
+        self.assertEqual(estimate['to_create_count'], generated)
+
+        estimate = self.order._estimate_segment_task_plan()
+        self.assertEqual(estimate['existing_count'], 10)
+        self.assertEqual(estimate['to_create_count'], 0)
+        self.assertEqual(estimate['to_update_count'], 0)
+        self.assertEqual(estimate['to_archive_count'], 0)
+
+        self.segment_level2.name = 'Renamed level 2'
+        estimate = self.order._estimate_segment_task_plan()
+        self.assertEqual(estimate['to_update_count'], 1)
+
+    def test_preview_action_notification(self):
+        action = self.order.action_preview_segment_tasks()
+        self.assertEqual(action['tag'], 'display_notification')
+        self.assertIn('10', action['params']['message'])
+
+    def test_project_link_stored_on_order(self):
+        """The generated project is stored on the order and read by key."""
+        self.order.action_confirm()
+        project = self.Project.search([('sale_line_id.order_id', '=', self.order.id)])
+        self.assertEqual(self.order.segment_project_id, project)
+
+        self.order.invalidate_recordset()
+        with self.assertQueryCount(1):
+            self.assertEqual(self.order._get_project(), project)
+
+    def test_segment_projects_resolved_in_batch(self):
+        """Orders without stored link fall back to their line project."""
+        self.order.action_confirm()
+        other_order = self.Order.create({'partner_id': self.partner.id})
+        other_line = self.OrderLine.create({
+            'order_id': other_order.id,
+            'product_id': self.product_a.id,
+            'product_uom_qty': 1.0,
+        })
+        other_project = self.Project.create({'name': 'Other', 'sale_line_id': other_line.id})
+        empty_order = self.Order.create({'partner_id': self.partner.id})
+
+        projects = (self.order | other_order | empty_order)._get_segment_projects()
+
+        self.assertEqual(projects[self.order.id], self.order.segment_project_id)
+        self.assertEqual(projects[other_order.id], other_project)
+        self.assertFalse(projects[empty_order.id])
+        self.assertFalse(other_order.segment_project_id, 'Resolution must not write')
+
+    def test_locked_order_is_skipped(self):
+        """An order whose generation lock is held elsewhere is left alone."""
+        SaleOrder = type(self.order)
+        with patch.object(SaleOrder, '_try_lock_segment_tasks', return_value=False):
+            self.order.action_confirm()
+        segment_tasks = self.Task.search([('segment_id', 'in', self.order.segment_ids.ids)])
+        self.assertFalse(segment_tasks, 'The worker holding the lock creates the tasks')
+
+    def _held_generation_locks(self):
+        self.env.cr.execute("""
+            SELECT COUNT(*) FROM pg_locks
+             WHERE locktype = 'advisory' AND pid = pg_backend_pid()
+               AND classid = %s AND objid = %s
+        """, [SEGMENT_TASK_LOCK_NAMESPACE, self.order.id])
+        return self.env.cr.fetchone()[0]
+
+    def test_generation_lock_is_reentrant_in_session(self):
+        self.assertTrue(self.order._try_lock_segment_tasks())
+        self.assertTrue(self.order._try_lock_segment_tasks())
+        self.order._release_segment_task_lock()
+        self.order._release_segment_task_lock()
+        self.assertFalse(self._held_generation_locks())
+
+    def test_generation_lock_released_after_generation(self):
+        """The session lock is released whether generation succeeds or fails."""
+        self.order.action_confirm()
+        self.assertFalse(self._held_generation_locks())
+
+        SaleOrder = type(self.order)
+        with patch.object(SaleOrder, '_execute_segment_task_plan', side_effect=UserError('boom')), \
+                self.assertRaises(UserError):
+            self.order._create_segment_tasks()
+        self.assertFalse(self._held_generation_locks())
+
+    @mute_logger('odoo.sql_db')
+    def test_concurrently_created_tasks_are_skipped(self):
+        """Tasks invisible to a stale snapshot are skipped by the unique index."""
+        self.order.action_confirm()
+        project = self.order._get_project()
+        all_tasks = self.Task.search([('project_id', '=', project.id)])
+        segment_tasks = all_tasks.filtered('segment_id')
+        self.assertTrue(all(segment_tasks.mapped('is_segment_task')))
+
+        # Plan as a worker whose snapshot predates the other worker's commit
+        SaleOrder = type(self.order)
+        order = self.order.with_context(_creating_segment_tasks=True)
+        with patch.object(SaleOrder, '_get_existing_task_map', return_value={}):
+            plan = order._prepare_segment_task_plan(project)
+        created = order._execute_segment_task_plan(plan)
+
+        self.assertFalse(created, 'Every insert should be skipped')
+        self.assertEqual(self.Task.search([('project_id', '=', project.id)]), all_tasks)
+
+    def test_manually_linked_task_not_taken_as_segment_task(self):
+        """A task linked to a segment by hand does not replace the generated one."""
+        self.order.action_confirm()
+        project = self.order._get_project()
+        manual_task = self.Task.create({
+            'name': 'Manual follow-up',
+            'project_id': project.id,
+            'segment_id': self.segment_root1.id,
+        })
+
+        existing = self.order._get_existing_task_map(project)
+
+        self.assertNotEqual(existing[(self.segment_root1.id, False)], manual_task)
+        self.assertTrue(existing[(self.segment_root1.id, False)].is_segment_task)
+
+    def test_legacy_segment_tasks_backfilled(self):
+        """Segment tasks generated before the flag existed are flagged once."""
+        self.order.action_confirm()
+        project = self.order._get_project()
+        generated = self.Task.search([('project_id', '=', project.id), ('segment_id', '!=', False)])
+        manual_task = self.Task.create({
+            'name': 'Manual follow-up',
+            'project_id': project.id,
+            'segment_id': self.segment_root1.id,
+        })
+        self.env.cr.execute(
+            "UPDATE project_task SET is_segment_task = FALSE WHERE id = ANY(%s)",
+            [generated.ids],
+        )
+        self.Task.invalidate_model(['is_segment_task'])
+
+        self.Task._backfill_is_segment_task()
+
+        self.assertTrue(all(generated.mapped('is_segment_task')))
+        self.assertFalse(manual_task.is_segment_task)
+        all_tasks = self.Task.search([('project_id', '=', project.id)])
+        self.order._create_segment_tasks()
+        self.assertEqual(self.Task.search([('project_id', '=', project.id)]), all_tasks,
+                         'Synchronisation should reuse the backfilled tasks')
+
     # --- Edge cases (3 tests) ---
 
     def test_order_without_segments_no_tasks(self):
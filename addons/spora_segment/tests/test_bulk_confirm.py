@@ -0,0 +1,101 @@
+"""Tests for the parallel bulk confirmation wizard."""
+
+from unittest.mock import patch
+
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestBulkConfirm(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Bulk Customer'})
+        cls.product = cls.env['product.product'].create({
+            'name': 'Bulk Service',
+            'list_price': 100.0,
+            'type': 'service',
+            'service_tracking': 'task_in_project',
+        })
+
+    def _create_order(self):
+        order = self.env['sale.order'].create({'partner_id': self.partner.id})
+        segment = self.env['sale.order.segment'].create({'name': 'Root', 'order_id': order.id})
+        self.env['sale.order.line'].create({
+            'order_id': order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 1.0,
+            'segment_id': segment.id,
+        })
+        return order
+
+    def _run_wizard(self, orders):
+        wizard = self.env['sale.order.bulk.confirm'].with_context(
+            active_model='sale.order',
+            active_ids=orders.ids,
+        ).create({})
+        wizard.action_confirm_orders()
+        return wizard
+
+    def test_default_orders_from_selection(self):
+        orders = self._create_order() | self._create_order()
+        wizard = self.env['sale.order.bulk.confirm'].with_context(
+            active_model='sale.order',
+            active_ids=orders.ids,
+        ).create({})
+        self.assertEqual(wizard.order_ids, orders)
+
+    def test_all_orders_confirmed(self):
+        orders = self._create_order() | self._create_order() | self._create_order()
+        wizard = self._run_wizard(orders)
+        self.assertEqual(wizard.state, 'done')
+        self.assertEqual(wizard.success_count, 3)
+        self.assertEqual(set(orders.mapped('state')), {'sale'})
+        tasks = self.env['project.task'].search([('segment_id', 'in', orders.segment_ids.ids)])
+        self.assertEqual(len(tasks), 3)
+
+    def test_failure_is_isolated(self):
+        """One failing order is reported and does not roll back the others."""
+        good, bad = self._create_order(), self._create_order()
+        SaleOrder = type(self.env['sale.order'])
+        original_create_tasks = SaleOrder._create_segment_tasks
+
+        def mock_create_tasks(order):
+            if order == bad:
+                raise UserError('Simulated confirmation failure')
+            return original_create_tasks(order)
+
+        with patch.object(SaleOrder, '_create_segment_tasks', mock_create_tasks):
+            wizard = self._run_wizard(good | bad)
+
+        self.assertEqual(good.state, 'sale')
+        self.assertIn(bad.state, ('draft', 'sent'))
+        result = wizard.result_ids.filtered(lambda r: r.order_id == bad)
+        self.assertFalse(result.success)
+        self.assertIn('Simulated confirmation failure', result.message)
+        self.assertEqual((wizard.success_count, wizard.failure_count), (1, 1))
+
+    def test_already_confirmed_order_reported(self):
+        order = self._create_order()
+        order.action_confirm()
+        wizard = self._run_wizard(order)
+        self.assertEqual(wizard.failure_count, 1)
+        self.assertFalse(wizard.result_ids.success)
+
+    def test_parallel_workers_confirm_orders(self):
+        """The thread pool path confirms each order through its own cursor."""
+        orders = self._create_order() | self._create_order() | self._create_order()
+        Wizard = type(self.env['sale.order.bulk.confirm'])
+        with patch.object(self.env.registry, 'in_test_mode', return_value=False), \
+                patch.object(Wizard, '_get_worker_count', return_value=2), \
+                patch.object(Wizard, '_confirm_order_in_new_cursor', autospec=True,
+                             side_effect=Wizard._confirm_order_in_new_cursor) as worker:
+            wizard = self._run_wizard(orders)
+
+        self.assertEqual(worker.call_count, 3)
+        self.assertEqual(wizard.success_count, 3)
+        self.assertEqual(set(orders.mapped('state')), {'sale'})
+        tasks = self.env['project.task'].search([('segment_id', 'in', orders.segment_ids.ids)])
+        self.assertEqual(len(tasks), 3)
@@ -1,6 +1,11 @@
 """Test to ensure no duplicate task creation when confirming orders with segments."""
 
+from unittest.mock import patch
+
 from odoo.tests import tagged, TransactionCase
+from odoo.tools import SQL
+
+from odoo.addons.spora_segment.models.sale_order import CONFLICT_CACHE_SEQUENCE
 
 
 @tagged('post_install', '-at_install')
@@ -248,3 +253,90 @@ class TestNoDuplicateTasks(TransactionCase):
             'task_in_project',
             'service_tracking should be restored after confirm'
         )
+
+    def test_confirm_does_not_write_products(self):
+        """Native task generation is skipped without touching product rows."""
+        order = self.SaleOrder.create({
+            'partner_id': self.partner.id,
+        })
+        segment = self.SaleOrderSegment.create({
+            'name': 'Test Segment',
+            'order_id': order.id,
+        })
+        self.env['sale.order.line'].create({
+            'order_id': order.id,
+            'product_id': self.product_service_1.id,
+            'product_uom_qty': 5.0,
+            'segment_id': segment.id,
+        })
+
+        ProductTemplate = type(self.env['product.template'])
+        ProductProduct = type(self.env['product.product'])
+        with patch.object(ProductTemplate, 'write', autospec=True) as template_write, \
+                patch.object(ProductProduct, 'write', autospec=True) as product_write:
+            order.action_confirm()
+
+        template_write.assert_not_called()
+        product_write.assert_not_called()
+        tasks = self.env['project.task'].search([('sale_order_id', '=', order.id)])
+        self.assertEqual(len(tasks), 2, 'Only the segment task and its product task')
+        self.assertTrue(all(task.segment_id for task in tasks))
+
+    def test_native_tasks_kept_without_segments(self):
+        """Orders without segments still get their native sale_project task."""
+        order = self.SaleOrder.create({
+            'partner_id': self.partner.id,
+        })
+        line = self.env['sale.order.line'].create({
+            'order_id': order.id,
+            'product_id': self.product_service_1.id,
+            'product_uom_qty': 5.0,
+        })
+
+        order.action_confirm()
+
+        self.assertTrue(line.task_id, 'sale_project should create the native task')
+
+    def test_conflict_check_cached_and_invalidated(self):
+        """Conflict diagnostics are cached until tracked products change."""
+        Order = self.SaleOrder
+        tracked_domain = [
+            ('type', '=', 'service'),
+            ('sale_ok', '=', True),
+            ('service_tracking', '!=', 'no'),
+        ]
+        expected = self.Product.search_count(tracked_domain)
+        result = Order.check_task_creation_conflicts()
+        self.assertEqual(result['warnings'][0]['count'], expected)
+
+        # Only the cache version is read
+        with self.assertQueryCount(1):
+            Order.check_task_creation_conflicts()
+
+        # Changes that leave the counted products as they are keep the cache
+        version = Order._get_task_conflict_cache_version()
+        self.product_service_1.write({'sale_ok': True, 'description_sale': 'Unrelated'})
+        self.Product.create({'name': 'Goods', 'type': 'consu'})
+        self.assertEqual(Order._get_task_conflict_cache_version(), version)
+
+        self.Product.create({
+            'name': 'Service Product 3',
+            'type': 'service',
+            'service_tracking': 'task_in_project',
+        })
+        result = Order.check_task_creation_conflicts()
+        self.assertEqual(result['warnings'][0]['count'], expected + 1)
+
+        self.product_service_1.service_tracking = 'no'
+        result = Order.check_task_creation_conflicts()
+        self.assertEqual(result['warnings'][0]['count'], expected)
+
+    def test_conflict_cache_version_on_fresh_sequence(self):
+        """The first invalidation of a fresh sequence changes the version."""
+        Order = self.SaleOrder
+        self.env.cr.execute(SQL(
+            "ALTER SEQUENCE %s RESTART", SQL.identifier(CONFLICT_CACHE_SEQUENCE),
+        ))
+        version = Order._get_task_conflict_cache_version()
+        Order._invalidate_task_creation_conflict_data()
+        self.assertNotEqual(Order._get_task_conflict_cache_version(), version)
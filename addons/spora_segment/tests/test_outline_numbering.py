@@ -217,3 +217,174 @@ class TestOutlineNumbering(TransactionCase):
         self.assertEqual(segments[0], seg1, 'First segment should be seg1')
         self.assertEqual(segments[1], seg2, 'Second segment should be seg2')
         self.assertEqual(segments[2], seg3, 'Third segment should be seg3')
+
+    def test_outline_number_renumbers_after_delete(self):
+        """Verify deleting a segment closes the gap for later siblings and their children."""
+        seg1 = self.Segment.create({
+            'name': 'First',
+            'order_id': self.order.id,
+            'sequence': 10,
+        })
+        seg2 = self.Segment.create({
+            'name': 'Second',
+            'order_id': self.order.id,
+            'sequence': 20,
+        })
+        seg3 = self.Segment.create({
+            'name': 'Third',
+            'order_id': self.order.id,
+            'sequence': 30,
+        })
+        seg3_child = self.Segment.create({
+            'name': 'Third - Child',
+            'order_id': self.order.id,
+            'parent_id': seg3.id,
+            'sequence': 10,
+        })
+
+        seg2.unlink()
+
+        self.assertEqual(seg1.outline_number, '1', 'Segments before the gap keep their number')
+        self.assertEqual(seg3.outline_number, '2', 'Later sibling should move up to 2')
+        self.assertEqual(seg3_child.outline_number, '2.1', 'Child should follow its parent prefix')
+
+    def test_outline_number_reparent(self):
+        """Verify moving a segment renumbers both the old and the new sibling group."""
+        root1 = self.Segment.create({
+            'name': 'Root 1',
+            'order_id': self.order.id,
+            'sequence': 10,
+        })
+        root2 = self.Segment.create({
+            'name': 'Root 2',
+            'order_id': self.order.id,
+            'sequence': 20,
+        })
+        child_a = self.Segment.create({
+            'name': 'Child A',
+            'order_id': self.order.id,
+            'parent_id': root1.id,
+            'sequence': 10,
+        })
+        child_b = self.Segment.create({
+            'name': 'Child B',
+            'order_id': self.order.id,
+            'parent_id': root1.id,
+            'sequence': 20,
+        })
+
+        child_a.write({'parent_id': root2.id})
+
+        self.assertEqual(child_b.outline_number, '1.1', 'Remaining child should become 1.1')
+        self.assertEqual(child_a.outline_number, '2.1', 'Moved child should become 2.1')
+
+    def test_recompute_outline_numbers_full_order(self):
+        """Verify the single-pass engine repairs every number of an order."""
+        root = self.Segment.create({
+            'name': 'Root',
+            'order_id': self.order.id,
+            'sequence': 10,
+        })
+        child = self.Segment.create({
+            'name': 'Child',
+            'order_id': self.order.id,
+            'parent_id': root.id,
+            'sequence': 10,
+        })
+
+        # Corrupt the stored numbers behind the ORM's back
+        self.env.cr.execute(
+            "UPDATE sale_order_segment SET outline_number = 'x' WHERE id IN %s",
+            [(root.id, child.id)],
+        )
+        (root | child).invalidate_recordset(['outline_number'])
+
+        self.Segment._recompute_outline_numbers(self.order.ids)
+
+        self.assertEqual(root.outline_number, '1')
+        self.assertEqual(child.outline_number, '1.1')
+
+    def test_outline_number_incremental_skips_unchanged_subtrees(self):
+        """Verify resequencing only touches siblings after the edit point."""
+        seg1 = self.Segment.create({
+            'name': 'First',
+            'order_id': self.order.id,
+            'sequence': 10,
+        })
+        seg1_child = self.Segment.create({
+            'name': 'First - Child',
+            'order_id': self.order.id,
+            'parent_id': seg1.id,
+            'sequence': 10,
+        })
+        seg2 = self.Segment.create({
+            'name': 'Second',
+            'order_id': self.order.id,
+            'sequence': 20,
+        })
+        seg3 = self.Segment.create({
+            'name': 'Third',
+            'order_id': self.order.id,
+            'sequence': 30,
+        })
+        seg3_child = self.Segment.create({
+            'name': 'Third - Child',
+            'order_id': self.order.id,
+            'parent_id': seg3.id,
+            'sequence': 10,
+        })
+
+        # Mark the untouched subtree so we can tell whether it was rewritten
+        self.env.cr.execute(
+            "UPDATE sale_order_segment SET outline_number = 'untouched' WHERE id = %s",
+            [seg1_child.id],
+        )
+        seg1_child.invalidate_recordset(['outline_number'])
+
+        # Swap Second and Third: First and its subtree keep their prefix
+        seg3.sequence = 15
+
+        self.assertEqual(seg1_child.outline_number, 'untouched',
+                         'Subtree with an unchanged prefix should not be renumbered')
+        self.assertEqual(seg3.outline_number, '2')
+        self.assertEqual(seg3_child.outline_number, '2.1')
+        self.assertEqual(seg2.outline_number, '3')
+
+    def test_outline_sort_key_numeric_order(self):
+        """Verify segment 10 sorts after segment 2 (numeric, not string, order)."""
+        segments = self.Segment.create([{
+            'name': 'Segment %d' % i,
+            'order_id': self.order.id,
+            'sequence': i,
+        } for i in range(1, 12)])
+
+        self.assertEqual(segments[9].outline_number, '10')
+        self.assertEqual(segments[1].outline_sort_key, '00002')
+        self.assertEqual(segments[9].outline_sort_key, '00010')
+
+        found = self.Segment.search([('order_id', '=', self.order.id)])
+        self.assertEqual(found.ids, segments.ids,
+                         'Default order should follow the true outline order')
+
+    def test_outline_sort_key_nested(self):
+        """Verify children sort right after their parent and before the next root."""
+        root1 = self.Segment.create({
+            'name': 'Root 1',
+            'order_id': self.order.id,
+            'sequence': 10,
+        })
+        root2 = self.Segment.create({
+            'name': 'Root 2',
+            'order_id': self.order.id,
+            'sequence': 20,
+        })
+        child = self.Segment.create({
+            'name': 'Root 1 - Child',
+            'order_id': self.order.id,
+            'parent_id': root1.id,
+            'sequence': 10,
+        })
+
+        self.assertEqual(child.outline_sort_key, '0000100001')
+        found = self.Segment.search([('order_id', '=', self.order.id)])
+        self.assertEqual(found.ids, [root1.id, child.id, root2.id])
@@ -419,6 +419,62 @@ class TestSaleOrderSegmentIntegration(TransactionCase):
         self.assertEqual(parent.total, 350.0,
                          'Parent total should cascade update to 350')
 
+    def test_segment_total_rollup_four_levels(self):
+        """Validate a price change on a level-4 line rolls up to every ancestor."""
+        order = self.Order.create({
+            'partner_id': self.partner.id,
+        })
+        segments = self.Segment
+        parent = self.Segment
+        for depth in range(1, 5):
+            parent = self.Segment.create({
+                'name': 'Level %d' % depth,
+                'order_id': order.id,
+                'parent_id': parent.id,
+            })
+            segments |= parent
+        line = self.OrderLine.create({
+            'order_id': order.id,
+            'product_id': self.product_a.id,
+            'product_uom_qty': 1,
+            'price_unit': 100.0,
+            'segment_id': parent.id,
+        })
+
+        self.assertEqual(segments.mapped('total'), [100.0] * 4,
+                         'Every ancestor should include the level-4 line')
+
+        line.price_unit = 40.0
+
+        self.assertEqual(segments.mapped('total'), [40.0] * 4,
+                         'Price change should roll up to every ancestor')
+
+    def test_segment_total_follows_reparent_and_archive(self):
+        """Validate totals follow moved and archived subtrees."""
+        order = self.Order.create({
+            'partner_id': self.partner.id,
+        })
+        root_a = self.Segment.create({'name': 'A', 'order_id': order.id})
+        root_b = self.Segment.create({'name': 'B', 'order_id': order.id})
+        child = self.Segment.create({'name': 'Child', 'order_id': order.id, 'parent_id': root_a.id})
+        grandchild = self.Segment.create({'name': 'Grandchild', 'order_id': order.id, 'parent_id': child.id})
+        self.OrderLine.create({
+            'order_id': order.id,
+            'product_id': self.product_b.id,
+            'product_uom_qty': 1,
+            'price_unit': 200.0,
+            'segment_id': grandchild.id,
+        })
+
+        self.assertEqual(root_a.total, 200.0)
+
+        child.parent_id = root_b
+        self.assertEqual(root_a.total, 0.0, 'Old parent should lose the moved subtree')
+        self.assertEqual(root_b.total, 200.0, 'New parent should gain the moved subtree')
+
+        child.active = False
+        self.assertEqual(root_b.total, 0.0, 'Archived subtree should not count')
+
     # --- SALE-11: Smart button segment_count ---
 
     def test_segment_count_zero(self):
@@ -11,8 +11,11 @@ Tests validate all HIER-01 through HIER-10 requirements including:
 - Segment flexibility (leaf, branch, both)
 """
 
+from unittest.mock import patch
+
 from odoo.tests import TransactionCase, tagged
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools import mute_logger
 
 
 @tagged('at_install')
@@ -234,6 +237,19 @@ class TestSaleOrderSegment(TransactionCase):
                                msg='Moving B under Z should fail because subtree would exceed depth'):
             b.write({'parent_id': z.id})
 
+    def test_depth_limit_batch_write(self):
+        """Validate one batched write checks every segment of the batch."""
+        root = self.Segment.create({'name': 'Root', 'order_id': self.order.id})
+        l2 = self.Segment.create({'name': 'L2', 'order_id': self.order.id, 'parent_id': root.id})
+        l3 = self.Segment.create({'name': 'L3', 'order_id': self.order.id, 'parent_id': l2.id})
+        shallow = self.Segment.create({'name': 'Shallow', 'order_id': self.order.id})
+        deep = self.Segment.create({'name': 'Deep', 'order_id': self.order.id})
+        self.Segment.create({'name': 'Deep child', 'order_id': self.order.id, 'parent_id': deep.id})
+
+        with self.assertRaisesRegex(ValidationError, 'Moving "Deep" here would create hierarchy of 5 levels',
+                                    msg='Batch containing one deep subtree should be rejected'):
+            (shallow | deep).write({'parent_id': l3.id})
+
     # --- HIER-07: sequence field and ordering ---
 
     def test_sequence_default(self):
@@ -376,3 +392,60 @@ class TestSaleOrderSegment(TransactionCase):
                          'Batch create should create 3 segments')
         self.assertEqual(segments[0].level, 1,
                          'All batch created root segments should have level=1')
+
+    # --- Bulk edit mode ---
+
+    def test_bulk_edit_defers_renumbering(self):
+        """Validate outline numbers are assigned once when the bulk edit ends."""
+        with self.Segment._bulk_edit() as Segment:
+            root = Segment.create({'name': 'Root', 'order_id': self.order.id, 'sequence': 10})
+            child = Segment.create({'name': 'Child', 'order_id': self.order.id,
+                                    'parent_id': root.id, 'sequence': 10})
+            self.assertFalse(root.outline_number,
+                             'Renumbering should be deferred inside the bulk edit')
+            child.write({'sequence': 5})
+
+        self.assertEqual(root.outline_number, '1')
+        self.assertEqual(child.outline_number, '1.1')
+        self.assertEqual(child.level, 2)
+        self.assertEqual(child.full_path, 'Root / Child')
+        self.assertEqual(root.child_depth, 1)
+
+    def test_load_reports_hierarchy_error(self):
+        """Validate an import breaking the depth limit returns an error message."""
+        rows = [['__test__.segment_l1', 'L1', str(self.order.id), '']]
+        for depth in range(2, 6):
+            rows.append(['__test__.segment_l%d' % depth, 'L%d' % depth, str(self.order.id),
+                         '__test__.segment_l%d' % (depth - 1)])
+        result = self.Segment.load(['id', 'name', 'order_id/.id', 'parent_id/id'], rows)
+
+        self.assertFalse(result['ids'])
+        self.assertEqual([message['type'] for message in result['messages']], ['error'])
+        self.assertIn('hierarchy', result['messages'][0]['message'])
+        self.assertFalse(self.Segment.search([('order_id', '=', self.order.id)]),
+                         'The rejected import should be rolled back')
+
+    @mute_logger('odoo.sql_db', 'odoo.addons.spora_segment.models.sale_order_segment')
+    def test_load_reports_database_error(self):
+        """Validate a database error at the end of an import is reported, not raised."""
+        def failing_renumbering(segments, order_ids):
+            segments.env.cr.execute('SELECT 1 / 0')
+
+        SegmentModel = type(self.Segment)
+        with patch.object(SegmentModel, '_recompute_outline_numbers', failing_renumbering):
+            result = self.Segment.load(['name', 'order_id/.id'], [['Imported', str(self.order.id)]])
+
+        self.assertFalse(result['ids'])
+        self.assertEqual([message['type'] for message in result['messages']], ['error'])
+        self.assertFalse(self.Segment.search([('order_id', '=', self.order.id)]),
+                         'The failed import should be rolled back')
+
+    def test_bulk_edit_validates_depth_on_exit(self):
+        """Validate the depth limit is still enforced for the whole batch."""
+        with self.assertRaises(ValidationError,
+                               msg='Exceeding the depth limit in bulk mode should raise on exit'):
+            with self.Segment._bulk_edit() as Segment:
+                parent = Segment.create({'name': 'L1', 'order_id': self.order.id})
+                for depth in range(2, 6):
+                    parent = Segment.create({'name': 'L%d' % depth, 'order_id': self.order.id,
+                                             'parent_id': parent.id})
@@ -0,0 +1,105 @@
+"""Tests for the optional sale.order.segment closure table.
+
+Covers:
+- Closure rows maintained on create, reparent and delete
+- Rebuild when the setting is enabled
+- Ancestor/descendant lookups, depth checks and total rollups using the closure
+"""
+
+from odoo.tests import TransactionCase, tagged
+from odoo.exceptions import ValidationError
+
+
+@tagged('post_install', '-at_install')
+class TestSegmentClosure(TransactionCase):
+    """Test suite for the segment closure table."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Segment = cls.env['sale.order.segment']
+        cls.Closure = cls.env['sale.order.segment.closure']
+        cls.partner = cls.env['res.partner'].create({'name': 'Test Customer'})
+        cls.order = cls.env['sale.order'].create({'partner_id': cls.partner.id})
+        cls.env['ir.config_parameter'].sudo().set_param('spora_segment.closure_table', 'True')
+
+    def _closure_pairs(self, segments):
+        rows = self.Closure.search([('descendant_id', 'in', segments.ids)])
+        return {(row.ancestor_id.id, row.descendant_id.id, row.depth) for row in rows}
+
+    def test_closure_rows_on_create(self):
+        """Each segment gets one row per ancestor plus itself at depth 0."""
+        root = self.Segment.create({'name': 'Root', 'order_id': self.order.id})
+        child = self.Segment.create({'name': 'Child', 'order_id': self.order.id, 'parent_id': root.id})
+        grandchild = self.Segment.create({'name': 'Grandchild', 'order_id': self.order.id, 'parent_id': child.id})
+
+        self.assertEqual(self._closure_pairs(grandchild), {
+            (root.id, grandchild.id, 2),
+            (child.id, grandchild.id, 1),
+            (grandchild.id, grandchild.id, 0),
+        })
+
+    def test_closure_rows_on_reparent(self):
+        """Moving a branch rewrites the rows of the whole moved subtree."""
+        root1 = self.Segment.create({'name': 'Root 1', 'order_id': self.order.id})
+        root2 = self.Segment.create({'name': 'Root 2', 'order_id': self.order.id})
+        child = self.Segment.create({'name': 'Child', 'order_id': self.order.id, 'parent_id': root1.id})
+        grandchild = self.Segment.create({'name': 'Grandchild', 'order_id': self.order.id, 'parent_id': child.id})
+
+        child.parent_id = root2
+
+        self.assertEqual(self._closure_pairs(grandchild), {
+            (root2.id, grandchild.id, 2),
+            (child.id, grandchild.id, 1),
+            (grandchild.id, grandchild.id, 0),
+        })
+        self.assertEqual(root1._get_descendants(), root1)
+
+    def test_closure_rows_removed_on_delete(self):
+        """Deleting a segment removes its rows through the foreign keys."""
+        root = self.Segment.create({'name': 'Root', 'order_id': self.order.id})
+        child = self.Segment.create({'name': 'Child', 'order_id': self.order.id, 'parent_id': root.id})
+        child_id = child.id
+
+        child.unlink()
+
+        self.assertFalse(self.Closure.search([('descendant_id', '=', child_id)]))
+
+    def test_closure_rebuild(self):
+        """Enabling the setting rebuilds the table from parent_path."""
+        root = self.Segment.create({'name': 'Root', 'order_id': self.order.id})
+        child = self.Segment.create({'name': 'Child', 'order_id': self.order.id, 'parent_id': root.id})
+        self.Segment._clear_closure()
+
+        self.Segment._rebuild_closure(self.order.ids)
+
+        self.assertEqual(self._closure_pairs(child), {
+            (root.id, child.id, 1),
+            (child.id, child.id, 0),
+        })
+
+    def test_closure_depth_limit(self):
+        """Depth checks read the closure table and keep their messages."""
+        parent = self.Segment
+        for depth in range(1, 5):
+            parent = self.Segment.create({'name': 'L%d' % depth, 'order_id': self.order.id,
+                                          'parent_id': parent.id})
+
+        with self.assertRaisesRegex(ValidationError, 'Maximum hierarchy depth is 4 levels'):
+            self.Segment.create({'name': 'L5', 'order_id': self.order.id, 'parent_id': parent.id})
+
+    def test_closure_total_rollup(self):
+        """Totals are rolled up through the closure table."""
+        product = self.env['product.product'].create({'name': 'Product', 'type': 'consu'})
+        root = self.Segment.create({'name': 'Root', 'order_id': self.order.id})
+        child = self.Segment.create({'name': 'Child', 'order_id': self.order.id, 'parent_id': root.id})
+        self.env['sale.order.line'].create({
+            'order_id': self.order.id,
+            'product_id': product.id,
+            'product_uom_qty': 2,
+            'price_unit': 50.0,
+            'segment_id': child.id,
+        })
+
+        self.assertEqual(root.total, 100.0)
+        self.assertEqual(child.total, 100.0)
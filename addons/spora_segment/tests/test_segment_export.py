@@ -0,0 +1,79 @@
+"""Tests for the streaming XLSX/CSV export of the segment tree."""
+
+import csv
+import io
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from odoo.addons.spora_segment.controllers import segment_export
+
+from .test_segment_report import SegmentReportCase
+
+
+@tagged('post_install', '-at_install')
+class TestSegmentExport(SegmentReportCase):
+
+    def _export_rows(self, orders):
+        self.env.flush_all()
+        return list(segment_export._iter_export_rows(
+            self.env.registry, self.env.uid, dict(self.env.context), orders.ids,
+        ))
+
+    def test_rows_in_outline_order(self):
+        order = self._create_order(roots=2, children=2)
+        rows = self._export_rows(order)
+
+        self.assertEqual(rows[0], segment_export.EXPORT_HEADERS)
+        self.assertEqual(
+            [(row[4], row[1], row[2]) for row in rows[1:]],
+            [
+                ('Segmento', '1', 1), ('Segmento', '1.1', 2), ('Línea', '1.1', 3),
+                ('Segmento', '1.2', 2), ('Línea', '1.2', 3),
+                ('Segmento', '2', 1), ('Segmento', '2.1', 2), ('Línea', '2.1', 3),
+                ('Segmento', '2.2', 2), ('Línea', '2.2', 3),
+            ],
+        )
+        root_row, child_row, line_row = rows[1:4]
+        self.assertEqual(child_row[3], 'Root 1 / Child 1.1')
+        self.assertEqual(line_row[6], 'Report Product')
+        self.assertEqual(line_row[7], 2.0)
+        self.assertEqual(line_row[10], 20.0)
+        self.assertEqual(root_row[11], 40.0)
+
+    def test_batches_keep_outline_order(self):
+        order = self._create_order(roots=3, children=2)
+        with patch.object(segment_export, 'EXPORT_BATCH_SIZE', 2):
+            batches = list(segment_export._iter_segment_batches(self.env, order.id))
+
+        self.assertEqual(len(batches), 5)
+        self.assertEqual(
+            [segment.outline_number for batch in batches for segment in batch],
+            ['1', '1.1', '1.2', '2', '2.1', '2.2', '3', '3.1', '3.2'],
+        )
+
+    def test_archived_branch_skipped(self):
+        order = self._create_order(roots=2, children=1)
+        order.segment_ids.filtered(lambda s: s.name == 'Root 1').active = False
+        rows = self._export_rows(order)
+
+        self.assertEqual(
+            [row[1] for row in rows[1:] if row[4] == 'Segmento'],
+            ['1', '1.1'],
+        )
+        self.assertNotIn('Root 1', {row[5] for row in rows[1:]})
+
+    def test_many_orders_in_one_file(self):
+        orders = self._create_order() | self._create_order()
+        body = b''.join(segment_export._stream_csv(iter(self._export_rows(orders))))
+        rows = list(csv.reader(io.StringIO(body.decode())))
+
+        self.assertEqual(rows[0], segment_export.EXPORT_HEADERS)
+        self.assertEqual([row[0] for row in rows[1:]], [orders[0].name] * 3 + [orders[1].name] * 3)
+
+    def test_export_action(self):
+        orders = self._create_order() | self._create_order()
+        action = orders.action_export_segment_hierarchy('csv')
+
+        self.assertEqual(action['type'], 'ir.actions.act_url')
+        self.assertEqual(action['url'], f'/spora_segment/export/csv?order_ids={orders[0].id},{orders[1].id}')
@@ -0,0 +1,124 @@
+"""Tests for sale.order.segment.move_subtrees().
+
+Covers:
+- Moving several branches under a new parent at a given position
+- Moving a branch to the root level
+- parent_path, level, full_path, outline numbers and totals after a move
+- Depth, cycle and cross-order validation
+- Write access rules and write_uid of the moved segments
+"""
+
+from odoo.tests import TransactionCase, new_test_user, tagged
+from odoo.exceptions import AccessError, ValidationError
+
+
+@tagged('post_install', '-at_install')
+class TestSegmentMove(TransactionCase):
+    """Test suite for bulk subtree moves."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Segment = cls.env['sale.order.segment']
+        cls.partner = cls.env['res.partner'].create({'name': 'Test Customer'})
+        cls.product = cls.env['product.product'].create({'name': 'Product', 'type': 'consu'})
+
+    def setUp(self):
+        super().setUp()
+        self.order = self.env['sale.order'].create({'partner_id': self.partner.id})
+
+        # A (1) -> A1 (1.1) -> A1a (1.1.1)
+        #       -> A2 (1.2)
+        # B (2) -> B1 (2.1)
+        self.a = self._segment('A', 10)
+        self.a1 = self._segment('A1', 10, self.a)
+        self.a1a = self._segment('A1a', 10, self.a1)
+        self.a2 = self._segment('A2', 20, self.a)
+        self.b = self._segment('B', 20)
+        self.b1 = self._segment('B1', 10, self.b)
+
+        self.env['sale.order.line'].create({
+            'order_id': self.order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 1,
+            'price_unit': 100.0,
+            'segment_id': self.a1a.id,
+        })
+
+    def _segment(self, name, sequence, parent=None):
+        return self.Segment.create({
+            'name': name,
+            'order_id': self.order.id,
+            'sequence': sequence,
+            'parent_id': parent.id if parent else False,
+        })
+
+    def test_move_branches_at_position(self):
+        """Two branches are inserted before B1, in the given order."""
+        moved = self.Segment.move_subtrees([self.a2.id, self.a1.id, self.a1a.id], self.b.id, position=0)
+
+        self.assertEqual(moved, self.a2 | self.a1,
+                         'Descendants of moved segments should follow their branch root')
+        self.assertEqual((self.a1 | self.a2).parent_id, self.b)
+        self.assertEqual(self.a1a.parent_id, self.a1, 'Moved subtree keeps its inner structure')
+        self.assertEqual(self.a1a.parent_path, '%s/%s/%s/' % (self.b.id, self.a1.id, self.a1a.id))
+        self.assertEqual(self.a1a.level, 3)
+        self.assertEqual(self.a1a.full_path, 'B / A1 / A1a')
+
+        self.assertEqual(self.a2.outline_number, '2.1')
+        self.assertEqual(self.a1.outline_number, '2.2')
+        self.assertEqual(self.a1a.outline_number, '2.2.1')
+        self.assertEqual(self.b1.outline_number, '2.3')
+
+        self.assertEqual(self.a.total, 0.0, 'Old ancestor should lose the moved total')
+        self.assertEqual(self.b.total, 100.0, 'New ancestor should gain the moved total')
+        self.assertEqual(self.a.child_count, 0)
+        self.assertEqual(self.b.child_depth, 2)
+
+    def test_move_branch_to_root(self):
+        """Moving to the root level appends the branch after the last root."""
+        self.Segment.move_subtrees(self.a1, False)
+
+        self.assertFalse(self.a1.parent_id)
+        self.assertEqual(self.a1.level, 1)
+        self.assertEqual(self.a1a.level, 2)
+        self.assertEqual(self.a1.outline_number, '3')
+        self.assertEqual(self.a1a.outline_number, '3.1')
+        self.assertEqual(self.a2.outline_number, '1.1')
+
+    def test_move_exceeding_depth_blocked(self):
+        """Depth is validated for the whole moved branch."""
+        b1a = self._segment('B1a', 10, self.b1)
+        with self.assertRaisesRegex(ValidationError, 'Moving "A1" here would create hierarchy of 5 levels'):
+            self.Segment.move_subtrees(self.a1, b1a)
+
+    def test_move_under_own_descendant_blocked(self):
+        """A branch cannot be moved below itself."""
+        with self.assertRaises(ValidationError):
+            self.Segment.move_subtrees(self.a, self.a1a)
+
+    def test_move_to_other_order_blocked(self):
+        """Branches cannot be moved to a parent of another order."""
+        other_order = self.env['sale.order'].create({'partner_id': self.partner.id})
+        other_parent = self.Segment.create({'name': 'Other', 'order_id': other_order.id})
+        with self.assertRaises(ValidationError):
+            self.Segment.move_subtrees(self.a1, other_parent)
+
+    def test_move_requires_write_access(self):
+        """A Sales User cannot restructure another salesperson's order."""
+        salesman = new_test_user(self.env, login='segment_move_salesman',
+                                 groups='sales_team.group_sale_salesman')
+        self.order.user_id = new_test_user(self.env, login='segment_move_owner',
+                                           groups='sales_team.group_sale_salesman')
+        with self.assertRaises(AccessError):
+            self.Segment.with_user(salesman).move_subtrees(self.a1, self.b)
+        self.assertEqual(self.a1.parent_id, self.a, 'The branch should not have moved')
+
+    def test_move_sets_write_uid(self):
+        """Moved and resequenced segments record who moved them."""
+        salesman = new_test_user(self.env, login='segment_move_salesman',
+                                 groups='sales_team.group_sale_salesman')
+        self.order.user_id = salesman
+        self.Segment.with_user(salesman).move_subtrees(self.a1, self.b, position=0)
+
+        self.assertEqual((self.a1 | self.a1a | self.b1).write_uid, salesman)
@@ -0,0 +1,292 @@
+"""Tests for the flattened rows of the hierarchical budget report."""
+
+import io
+from unittest.mock import patch
+
+from odoo.exceptions import ValidationError
+from odoo.tests import TransactionCase, tagged
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+
+from odoo.addons.spora_segment.report.sale_order_segment_report import PREBUILT_ROWS_CACHE_KEY
+
+REPORT_NAME = 'spora_segment.report_saleorder_document_segment'
+
+
+class SegmentReportCase(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Report = cls.env['report.spora_segment.report_saleorder_document_segment']
+        cls.partner = cls.env['res.partner'].create({'name': 'Report Customer'})
+        cls.product = cls.env['product.product'].create({
+            'name': 'Report Product',
+            'list_price': 10.0,
+        })
+
+    def _create_order(self, roots=1, children=1, lines=1):
+        Segment = self.env['sale.order.segment']
+        order = self.env['sale.order'].create({'partner_id': self.partner.id})
+        for root_index in range(roots):
+            root = Segment.create({
+                'name': f'Root {root_index + 1}',
+                'order_id': order.id,
+                'sequence': root_index,
+            })
+            for child_index in range(children):
+                child = Segment.create({
+                    'name': f'Child {root_index + 1}.{child_index + 1}',
+                    'order_id': order.id,
+                    'parent_id': root.id,
+                    'sequence': child_index,
+                })
+                for _line in range(lines):
+                    self.env['sale.order.line'].create({
+                        'order_id': order.id,
+                        'product_id': self.product.id,
+                        'product_uom_qty': 2.0,
+                        'segment_id': child.id,
+                    })
+        return order
+
+
+@tagged('post_install', '-at_install')
+class TestSegmentReport(SegmentReportCase):
+
+    def test_rows_in_outline_order(self):
+        order = self._create_order(roots=2, children=2)
+        rows = self.Report._get_segment_rows(order)[order.id]
+
+        self.assertEqual(
+            [(row['type'], row['outline'] or row['label']) for row in rows],
+            [
+                ('segment', '1'), ('segment', '1.1'), ('line', 'Report Product'),
+                ('segment', '1.2'), ('line', 'Report Product'),
+                ('segment', '2'), ('segment', '2.1'), ('line', 'Report Product'),
+                ('segment', '2.2'), ('line', 'Report Product'),
+            ],
+        )
+        root_row, child_row, line_row = rows[:3]
+        self.assertEqual(root_row['indent'], 15)
+        self.assertEqual(child_row['indent'], 30)
+        self.assertEqual(line_row['indent'], 45)
+        self.assertIn('20', line_row['total'])
+        self.assertIn('40', root_row['total'])
+
+    def test_fixed_query_count(self):
+        """Rows of bigger budgets and of several orders take the same queries."""
+        small = self._create_order()
+        big = self._create_order(roots=3, children=3, lines=3)
+        other = self._create_order(roots=2)
+
+        def count_queries(orders):
+            self.env.invalidate_all()
+            before = self.env.cr.sql_log_count
+            self.Report._get_segment_rows(orders)
+            return self.env.cr.sql_log_count - before
+
+        self.assertEqual(count_queries(big | other), count_queries(small))
+
+    def test_archived_segment_hidden(self):
+        order = self._create_order(roots=2)
+        order.segment_ids.filtered(lambda s: s.name == 'Root 2').active = False
+        rows = self.Report._get_segment_rows(order)[order.id]
+        self.assertNotIn('Root 2', [row['label'] for row in rows])
+
+    def test_render_html(self):
+        order = self._create_order()
+        html, _report_type = self.env['ir.actions.report']._render_qweb_html(REPORT_NAME, order.ids)
+        self.assertIn(b'Child 1.1', html)
+        self.assertIn(b'Report Product', html)
+
+
+def _blank_pdf():
+    writer = PdfFileWriter()
+    writer.addBlankPage(10, 10)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+@tagged('post_install', '-at_install')
+class TestSegmentReportCache(SegmentReportCase):
+
+    def _prepare_streams(self, order):
+        Report = self.env['ir.actions.report']
+        with patch.object(type(Report), '_run_wkhtmltopdf', autospec=True, return_value=_blank_pdf()) as run:
+            streams = Report._render_qweb_pdf_prepare_streams(REPORT_NAME, {'report_type': 'pdf'}, res_ids=order.ids)
+        return streams[order.id]['stream'].getvalue(), run.call_count
+
+    def _cached_attachments(self, order):
+        return self.env['ir.attachment'].search([
+            ('res_model', '=', 'sale.order'),
+            ('res_id', '=', order.id),
+            ('name', '=like', 'segment_budget_%.pdf'),
+        ])
+
+    def test_unchanged_order_served_from_cache(self):
+        order = self._create_order()
+        pdf, renders = self._prepare_streams(order)
+        self.assertEqual(renders, 1)
+        self.assertEqual(len(self._cached_attachments(order)), 1)
+
+        cached_pdf, renders = self._prepare_streams(order)
+        self.assertEqual(renders, 0, 'An unchanged order should not be rendered again')
+        self.assertEqual(cached_pdf, pdf)
+
+    def test_changed_line_invalidates_cache(self):
+        order = self._create_order()
+        self._prepare_streams(order)
+        first_attachment = self._cached_attachments(order)
+
+        order.order_line[:1].product_uom_qty = 3.0
+        _pdf, renders = self._prepare_streams(order)
+
+        self.assertEqual(renders, 1)
+        self.assertFalse(first_attachment.exists(), 'The stale PDF should be replaced')
+        self.assertEqual(len(self._cached_attachments(order)), 1)
+
+    def test_digest_follows_content(self):
+        order = self._create_order()
+        digest = self.Report._get_report_digests(order)[order.id]
+        self.assertEqual(self.Report._get_report_digests(order)[order.id], digest)
+        order.segment_ids[:1].name = 'Renamed root'
+        # write_date is the transaction time: move it as a later transaction would
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE sale_order_segment SET write_date = write_date + interval '1 second' WHERE id = %s",
+            [order.segment_ids[:1].id],
+        )
+        self.assertNotEqual(self.Report._get_report_digests(order)[order.id], digest)
+
+    def test_digest_does_not_build_rows(self):
+        order = self._create_order(roots=2, children=2)
+        Report = type(self.Report)
+        with patch.object(Report, '_get_segment_rows', autospec=True) as get_rows:
+            self.Report._get_report_digests(order)
+        get_rows.assert_not_called()
+
+
+@tagged('post_install', '-at_install')
+class TestSegmentReportChunks(SegmentReportCase):
+
+    def test_row_chunks_never_end_on_segment(self):
+        order = self._create_order(roots=2, children=2)
+        rows = self.Report._get_segment_rows(order)[order.id]
+
+        chunks = self.Report._get_row_chunks(order, chunk_rows=4)
+
+        self.assertEqual(chunks, [(0, 3), (3, 5), (5, 8), (8, 10)])
+        for _start, end in chunks[:-1]:
+            self.assertEqual(rows[end - 1]['type'], 'line')
+
+    def test_chunk_carries_running_totals(self):
+        order = self._create_order(roots=2, children=2)
+        values = self.Report._get_report_values(order.ids, data={'segment_row_range': [3, 5]})
+        chunk = values['segment_chunks'][order.id]
+
+        self.assertEqual(len(values['segment_rows'][order.id]), 2)
+        self.assertFalse(chunk['first'])
+        self.assertFalse(chunk['last'])
+        self.assertIn('20', chunk['carried_in'])
+        self.assertIn('40', chunk['carried_out'])
+
+    def test_large_report_rendered_in_chunks_and_merged(self):
+        order = self._create_order(roots=2, children=2)
+        Report = self.env['ir.actions.report']
+        SegmentReport = type(self.Report)
+        with patch('odoo.addons.spora_segment.report.sale_order_segment_report.SEGMENT_REPORT_CHUNK_ROWS', 4), \
+                patch.object(type(Report), '_run_wkhtmltopdf', autospec=True, return_value=_blank_pdf()) as run, \
+                patch.object(SegmentReport, '_get_segment_rows', autospec=True,
+                             side_effect=SegmentReport._get_segment_rows) as get_rows:
+            streams = Report._render_qweb_pdf_prepare_streams(REPORT_NAME, {'report_type': 'pdf'}, res_ids=order.ids)
+
+        self.assertEqual(run.call_count, 4)
+        self.assertEqual(get_rows.call_count, 1, 'The rows should be built once for all chunks')
+        self.assertNotIn(PREBUILT_ROWS_CACHE_KEY, [
+            key for key, value in self.env.cr.cache.items() if value
+        ], 'Prebuilt rows should not outlive the rendering')
+        merged = PdfFileReader(streams[order.id]['stream'], strict=False)
+        self.assertEqual(merged.getNumPages(), 4)
+
+    def test_chunks_rendered_by_workers_with_own_cursors(self):
+        """Outside test mode, chunks are converted concurrently through new cursors."""
+        order = self._create_order(roots=2, children=2)
+        Report = self.env['ir.actions.report'].with_context(segment_report_test_marker=True)
+        calls = []
+
+        def run_wkhtmltopdf(report, bodies, **kwargs):
+            calls.append((report.env.cr, report.env.uid, report.env.context.get('segment_report_test_marker')))
+            self.assertIsInstance(kwargs['footer'], str)
+            return _blank_pdf()
+
+        with patch('odoo.addons.spora_segment.report.sale_order_segment_report.SEGMENT_REPORT_CHUNK_ROWS', 4), \
+                patch.object(self.env.registry, 'in_test_mode', return_value=False), \
+                patch.object(type(Report), '_run_wkhtmltopdf', autospec=True, side_effect=run_wkhtmltopdf):
+            streams = Report._render_qweb_pdf_prepare_streams(REPORT_NAME, {'report_type': 'pdf'}, res_ids=order.ids)
+
+        self.assertEqual(len(calls), 4)
+        for cr, uid, marker in calls:
+            self.assertIsNot(cr, self.env.cr, 'Each chunk should use a cursor of its own')
+            self.assertEqual(uid, self.env.uid)
+            self.assertTrue(marker, 'The caller context should reach the workers')
+        merged = PdfFileReader(streams[order.id]['stream'], strict=False)
+        self.assertEqual(merged.getNumPages(), 4)
+
+    def test_page_counters_removed_from_footer(self):
+        footer = '<div class="footer"><div class="text-muted">Page: <span class="page"/> / <span class="topage"/></div><p>Spora</p></div>'
+        stripped = self.env['ir.actions.report']._strip_page_numbers(footer)
+        self.assertNotIn('topage', stripped)
+        self.assertIn('Spora', stripped)
+
+
+@tagged('post_install', '-at_install')
+class TestSegmentReportSummary(SegmentReportCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Summary = cls.env['report.spora_segment.report_saleorder_document_segment_summary']
+
+    def test_depth_limits_rows(self):
+        order = self._create_order(roots=2, children=2)
+
+        rows = self.Summary._get_segment_rows(order, max_depth=1)[order.id]
+        self.assertEqual([row['outline'] for row in rows], ['1', '2'])
+        self.assertIn('40', rows[0]['total'], 'Collapsed segments show their stored total')
+
+        rows = self.Summary._get_segment_rows(order, max_depth=2)[order.id]
+        self.assertEqual([row['type'] for row in rows], ['segment'] * 6)
+
+        rows = self.Summary._get_segment_rows(order, max_depth=3)[order.id]
+        self.assertEqual(len([row for row in rows if row['type'] == 'line']), 4)
+
+    def test_lines_below_cut_not_loaded(self):
+        order = self._create_order(roots=2, children=2)
+        Line = type(self.env['sale.order.line'])
+        with patch.object(Line, 'search_fetch', autospec=True, side_effect=Line.search_fetch) as search_fetch:
+            self.Summary._get_segment_rows(order, max_depth=2)
+        domain = search_fetch.call_args.args[1]
+        roots = order.segment_ids.filtered(lambda s: s.level == 1)
+        self.assertEqual(domain, [('segment_id', 'in', roots.ids)])
+
+    def test_report_values_use_requested_depth(self):
+        order = self._create_order(roots=2, children=2)
+        values = self.Summary._get_report_values(order.ids, data={'max_depth': 1})
+        self.assertEqual(len(values['segment_rows'][order.id]), 2)
+        values = self.Summary._get_report_values(order.ids)
+        self.assertEqual(len(values['segment_rows'][order.id]), 6)
+
+    def test_print_wizard(self):
+        order = self._create_order()
+        wizard = self.env['sale.order.segment.report.wizard'].with_context(
+            active_model='sale.order',
+            active_ids=order.ids,
+        ).create({'mode': 'summary', 'max_depth': 1})
+
+        action = wizard.action_print()
+
+        self.assertEqual(action['report_name'], 'spora_segment.report_saleorder_document_segment_summary')
+        self.assertEqual(action['data'], {'max_depth': 1})
+        with self.assertRaises(ValidationError):
+            wizard.max_depth = 9
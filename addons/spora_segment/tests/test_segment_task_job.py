@@ -0,0 +1,192 @@
+"""Tests for background generation of segment tasks (ir.cron job queue)."""
+
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.spora_segment.models.sale_order import (
+    SEGMENT_TASK_MAX_ATTEMPTS,
+    SEGMENT_TASK_STALE_AFTER,
+)
+
+
+@tagged('post_install', '-at_install')
+class TestSegmentTaskJob(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['ir.config_parameter'].sudo().set_param(
+            'spora_segment.async_task_generation', 'True'
+        )
+        cls.partner = cls.env['res.partner'].create({'name': 'Job Customer'})
+        cls.product = cls.env['product.product'].create({
+            'name': 'Job Service',
+            'list_price': 100.0,
+            'type': 'service',
+            'service_tracking': 'task_in_project',
+        })
+
+    def setUp(self):
+        super().setUp()
+        Segment = self.env['sale.order.segment']
+        self.order = self.env['sale.order'].create({'partner_id': self.partner.id})
+        self.root = Segment.create({'name': 'Root', 'order_id': self.order.id})
+        self.child = Segment.create({
+            'name': 'Child',
+            'order_id': self.order.id,
+            'parent_id': self.root.id,
+        })
+        self.env['sale.order.line'].create({
+            'order_id': self.order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 2.0,
+            'segment_id': self.child.id,
+        })
+
+    def _segment_tasks(self):
+        return self.env['project.task'].search([('segment_id', 'in', self.order.segment_ids.ids)])
+
+    def test_confirm_enqueues_instead_of_generating(self):
+        """Confirmation returns right away with a queued job and no tasks."""
+        self.order.action_confirm()
+        self.assertEqual(self.order.state, 'sale')
+        self.assertEqual(self.order.segment_task_state, 'queued')
+        self.assertEqual(self.order.segment_task_user_id, self.env.user)
+        self.assertFalse(self._segment_tasks())
+
+    def test_cron_generates_tasks_and_notifies(self):
+        """The cron job creates the project tasks and notifies the requester."""
+        self.order.action_confirm()
+        with patch.object(type(self.env['bus.bus']), '_sendone') as sendone:
+            self.env['sale.order']._cron_generate_segment_tasks()
+        self.assertEqual(self.order.segment_task_state, 'done')
+        self.assertEqual(self.order.segment_task_progress, 100)
+        self.assertEqual(self.order.segment_task_attempts, 1)
+        self.assertEqual(len(self._segment_tasks()), 2)
+        sendone.assert_called_once()
+        self.assertEqual(sendone.call_args.args[2]['type'], 'success')
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        """Failures are retried later, up to the maximum number of attempts."""
+        self.order.action_confirm()
+
+        def mock_failure(order):
+            raise UserError('Simulated generation failure')
+
+        SaleOrder = type(self.env['sale.order'])
+        with patch.object(SaleOrder, '_create_segment_tasks', mock_failure), \
+                patch.object(type(self.env['bus.bus']), '_sendone') as sendone:
+            self.env['sale.order']._cron_generate_segment_tasks()
+            self.assertEqual(self.order.segment_task_state, 'queued')
+            self.assertEqual(self.order.segment_task_attempts, 1)
+            self.assertIn('Simulated generation failure', self.order.segment_task_error)
+            self.assertGreater(self.order.segment_task_retry_at, fields.Datetime.now())
+
+            # Not due yet: the next run leaves the job alone
+            self.env['sale.order']._cron_generate_segment_tasks()
+            self.assertEqual(self.order.segment_task_attempts, 1)
+            sendone.assert_not_called()
+
+            for _attempt in range(1, SEGMENT_TASK_MAX_ATTEMPTS):
+                self.order.segment_task_retry_at = fields.Datetime.now()
+                self.env['sale.order']._cron_generate_segment_tasks()
+
+        self.assertEqual(self.order.segment_task_state, 'failed')
+        self.assertEqual(self.order.segment_task_attempts, SEGMENT_TASK_MAX_ATTEMPTS)
+        self.assertFalse(self._segment_tasks())
+        sendone.assert_called_once()
+        self.assertEqual(sendone.call_args.args[2]['type'], 'danger')
+
+        self.order.action_retry_segment_tasks()
+        self.assertEqual(self.order.segment_task_state, 'queued')
+        self.assertEqual(self.order.segment_task_attempts, 0)
+
+    def test_stale_running_job_is_reclaimed(self):
+        """A job left running by a dead worker is retried, then marked failed."""
+        self.order.action_confirm()
+        self.order.write({
+            'segment_task_state': 'running',
+            'segment_task_attempts': 1,
+            'segment_task_heartbeat': fields.Datetime.now(),
+        })
+        self.env['sale.order']._cron_generate_segment_tasks()
+        self.assertEqual(self.order.segment_task_state, 'running',
+                         'A job with a recent heartbeat belongs to a live worker')
+
+        self.order.segment_task_heartbeat = fields.Datetime.now() - SEGMENT_TASK_STALE_AFTER * 2
+        self.env['sale.order']._cron_generate_segment_tasks()
+        self.assertEqual(self.order.segment_task_state, 'done')
+        self.assertEqual(self.order.segment_task_attempts, 2)
+        self.assertEqual(len(self._segment_tasks()), 2)
+
+    def test_stale_job_with_live_lock_is_left_alone(self):
+        """A late heartbeat is not enough when the worker still holds the lock."""
+        self.order.action_confirm()
+        self.order.write({
+            'segment_task_state': 'running',
+            'segment_task_attempts': 1,
+            'segment_task_heartbeat': fields.Datetime.now() - SEGMENT_TASK_STALE_AFTER * 2,
+        })
+        SaleOrder = type(self.env['sale.order'])
+        with patch.object(SaleOrder, '_try_lock_segment_tasks', return_value=False), \
+                patch.object(SaleOrder, '_run_segment_task_job') as run_job:
+            self.env['sale.order']._cron_generate_segment_tasks()
+        run_job.assert_not_called()
+        self.assertEqual(self.order.segment_task_state, 'running')
+        self.assertEqual(self.order.segment_task_attempts, 1)
+
+    def test_locked_job_is_postponed_without_using_an_attempt(self):
+        self.order.action_confirm()
+        with patch.object(type(self.env['sale.order']), '_try_lock_segment_tasks', return_value=False), \
+                patch.object(type(self.env['bus.bus']), '_sendone') as sendone:
+            self.order._run_segment_task_job()
+        self.assertEqual(self.order.segment_task_state, 'queued')
+        self.assertEqual(self.order.segment_task_attempts, 0)
+        self.assertGreater(self.order.segment_task_retry_at, fields.Datetime.now())
+        sendone.assert_not_called()
+        self.assertFalse(self._segment_tasks())
+
+    def test_heartbeat_within_level(self):
+        """Large levels are created in batches, beating between them."""
+        for index in range(2):
+            self.env['sale.order.line'].create({
+                'order_id': self.order.id,
+                'product_id': self.product.id,
+                'product_uom_qty': 1.0,
+                'segment_id': self.child.id,
+                'name': 'Extra %s' % index,
+            })
+        self.order.action_confirm()
+        SaleOrder = type(self.env['sale.order'])
+        with patch('odoo.addons.spora_segment.models.sale_order.SEGMENT_TASK_CREATE_BATCH', 1), \
+                patch.object(SaleOrder, '_report_segment_task_progress',
+                             autospec=True, side_effect=SaleOrder._report_segment_task_progress) as report:
+            self.env['sale.order']._cron_generate_segment_tasks()
+        self.assertEqual(self.order.segment_task_state, 'done')
+        fractions = [call.args[1] for call in report.call_args_list if call.args[1] % 1]
+        self.assertTrue(fractions, 'Progress should be reported inside the product level')
+
+    def test_stale_job_without_attempts_left_fails(self):
+        self.order.action_confirm()
+        self.order.write({
+            'segment_task_state': 'running',
+            'segment_task_attempts': SEGMENT_TASK_MAX_ATTEMPTS,
+            'segment_task_heartbeat': fields.Datetime.now() - SEGMENT_TASK_STALE_AFTER * 2,
+        })
+        with patch.object(type(self.env['bus.bus']), '_sendone') as sendone:
+            self.env['sale.order']._cron_generate_segment_tasks()
+        self.assertEqual(self.order.segment_task_state, 'failed')
+        self.assertTrue(self.order.segment_task_error)
+        self.assertEqual(sendone.call_args.args[2]['type'], 'danger')
+
+        self.order.action_retry_segment_tasks()
+        self.assertEqual(self.order.segment_task_state, 'queued')
+
+    def test_synchronous_mode_by_context(self):
+        """The context key overrides the setting and keeps generation inline."""
+        self.order.with_context(segment_tasks_async=False).action_confirm()
+        self.assertFalse(self.order.segment_task_state)
+        self.assertEqual(len(self._segment_tasks()), 2)
@@ -0,0 +1,198 @@
+"""Tests for the incremental synchronisation of segment tasks after confirmation."""
+
+from unittest.mock import patch
+
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import mute_logger
+
+
+@tagged('post_install', '-at_install')
+class TestSegmentTaskSync(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Task = cls.env['project.task']
+        cls.Segment = cls.env['sale.order.segment']
+        cls.OrderLine = cls.env['sale.order.line']
+        cls.partner = cls.env['res.partner'].create({'name': 'Sync Customer'})
+        cls.product_a = cls.env['product.product'].create({
+            'name': 'Sync Service A',
+            'list_price': 100.0,
+            'type': 'service',
+            'service_tracking': 'task_in_project',
+        })
+        cls.product_b = cls.env['product.product'].create({
+            'name': 'Sync Service B',
+            'list_price': 50.0,
+            'type': 'service',
+            'service_tracking': 'task_in_project',
+        })
+
+    def setUp(self):
+        super().setUp()
+        self.order = self.env['sale.order'].create({'partner_id': self.partner.id})
+        self.root1 = self.Segment.create({'name': 'Root 1', 'order_id': self.order.id, 'sequence': 10})
+        self.root2 = self.Segment.create({'name': 'Root 2', 'order_id': self.order.id, 'sequence': 20})
+        self.child = self.Segment.create({
+            'name': 'Child',
+            'order_id': self.order.id,
+            'parent_id': self.root1.id,
+        })
+        self.line = self.OrderLine.create({
+            'order_id': self.order.id,
+            'product_id': self.product_a.id,
+            'product_uom_qty': 2.0,
+            'segment_id': self.child.id,
+        })
+        self.order.action_confirm()
+        self.project = self.order._get_project()
+
+    def _segment_task(self, segment):
+        return self.Task.with_context(active_test=False).search([
+            ('segment_id', '=', segment.id),
+            ('is_segment_task', '=', True),
+        ])
+
+    def _line_task(self, line):
+        return self.Task.with_context(active_test=False).search([('sale_line_id', '=', line.id)])
+
+    def test_edits_flag_order_outdated(self):
+        self.assertFalse(self.order.segment_tasks_outdated)
+        self.child.name = 'Renamed child'
+        self.assertTrue(self.order.segment_tasks_outdated)
+        self.order.action_sync_segment_tasks()
+        self.assertFalse(self.order.segment_tasks_outdated)
+
+    def test_rename_and_move_update_existing_tasks(self):
+        child_task = self._segment_task(self.child)
+        self.child.write({'name': 'Renamed child', 'parent_id': self.root2.id})
+
+        self.order.action_sync_segment_tasks()
+
+        self.assertEqual(self._segment_task(self.child), child_task, 'Task should be updated, not recreated')
+        self.assertEqual(child_task.name, 'Renamed child')
+        self.assertEqual(child_task.parent_id, self._segment_task(self.root2))
+
+    def test_new_line_and_quantity_change(self):
+        new_line = self.OrderLine.create({
+            'order_id': self.order.id,
+            'product_id': self.product_b.id,
+            'product_uom_qty': 4.0,
+            'segment_id': self.root2.id,
+        })
+        self.line.product_uom_qty = 5.0
+
+        self.order.action_sync_segment_tasks()
+
+        self.assertEqual(self._line_task(new_line).parent_id, self._segment_task(self.root2))
+        self.assertEqual(self._line_task(new_line).allocated_hours, 4.0)
+        self.assertEqual(self._line_task(self.line).allocated_hours, 5.0)
+
+    def test_moved_line_keeps_its_task(self):
+        line_task = self._line_task(self.line)
+        self.line.segment_id = self.root2
+
+        self.order.action_sync_segment_tasks()
+
+        self.assertEqual(self._line_task(self.line), line_task)
+        self.assertEqual(line_task.parent_id, self._segment_task(self.root2))
+        self.assertTrue(line_task.active)
+
+    def test_archived_segment_archives_its_tasks_and_restores_them(self):
+        child_task = self._segment_task(self.child)
+        line_task = self._line_task(self.line)
+        self.child.active = False
+
+        self.order.action_sync_segment_tasks()
+        self.assertFalse(child_task.active)
+        self.assertFalse(line_task.active)
+
+        self.child.active = True
+        self.order.action_sync_segment_tasks()
+        self.assertTrue(child_task.active, 'The archived task should be restored, not duplicated')
+        self.assertTrue(line_task.active)
+        self.assertEqual(self._segment_task(self.child), child_task)
+
+    def test_archived_segment_without_lines_keeps_its_task(self):
+        """Tasks of archived segments are mapped without relying on sale lines."""
+        root_task = self._segment_task(self.root2)
+        self.root2.active = False
+        self.order.action_sync_segment_tasks()
+
+        existing = self.order._get_existing_task_map(self.project)
+        self.assertEqual(existing[(self.root2.id, False)], root_task)
+
+        self.root2.active = True
+        self.order.action_sync_segment_tasks()
+        self.assertTrue(root_task.active)
+        self.assertEqual(self._segment_task(self.root2), root_task)
+
+    def test_manually_linked_task_not_archived(self):
+        manual_task = self.Task.create({
+            'name': 'Manual follow-up',
+            'project_id': self.project.id,
+            'segment_id': self.child.id,
+        })
+        self.order.action_sync_segment_tasks()
+        self.assertTrue(manual_task.active)
+
+    def test_unchanged_tree_writes_nothing(self):
+        TaskModel = type(self.Task)
+        with patch.object(TaskModel, 'write', autospec=True) as task_write, \
+                patch.object(TaskModel, 'create', autospec=True) as task_create:
+            self.order.action_sync_segment_tasks()
+        task_write.assert_not_called()
+        task_create.assert_not_called()
+
+    def test_cron_syncs_outdated_orders(self):
+        self.root1.name = 'Scheduled rename'
+        self.env['sale.order']._cron_sync_segment_tasks()
+        self.assertFalse(self.order.segment_tasks_outdated)
+        self.assertEqual(self._segment_task(self.root1).name, 'Scheduled rename')
+
+    def test_cron_keeps_flag_when_sync_fails_or_is_skipped(self):
+        """Orders that were not synchronised stay flagged for the next run."""
+        SaleOrder = type(self.order)
+        self.root1.name = 'Pending rename'
+        with patch.object(SaleOrder, '_execute_segment_task_plan', side_effect=UserError('boom')), \
+                mute_logger('odoo.addons.spora_segment.models.sale_order'):
+            self.env['sale.order']._cron_sync_segment_tasks()
+        self.assertTrue(self.order.segment_tasks_outdated)
+
+        with patch.object(SaleOrder, '_try_lock_segment_tasks', return_value=False):
+            self.env['sale.order']._cron_sync_segment_tasks()
+        self.assertTrue(self.order.segment_tasks_outdated)
+
+        self.env['sale.order']._cron_sync_segment_tasks()
+        self.assertFalse(self.order.segment_tasks_outdated)
+        self.assertEqual(self._segment_task(self.root1).name, 'Pending rename')
+
+    def test_quiet_profile_posts_single_summary(self):
+        """Quiet generation leaves no chatter on tasks and one note on the project."""
+        self.OrderLine.create({
+            'order_id': self.order.id,
+            'product_id': self.product_b.id,
+            'product_uom_qty': 1.0,
+            'segment_id': self.root2.id,
+        })
+        self.child.active = False
+        project_messages = self.project.message_ids
+
+        self.order.with_context(segment_task_profile='quiet').action_sync_segment_tasks()
+
+        new_task = self._line_task(self.order.order_line[-1:])
+        self.assertFalse(new_task.message_ids, 'No creation log or tracking on the task')
+        summary = self.project.message_ids - project_messages
+        self.assertEqual(len(summary), 1)
+        self.assertIn('1 creadas, 2 archivadas', summary.body)
+
+    def test_bulk_paths_default_to_quiet_profile(self):
+        SaleOrder = type(self.order)
+        with patch.object(SaleOrder, '_post_segment_task_summary', autospec=True) as post_summary:
+            self.root1.name = 'Scheduled rename'
+            self.env['sale.order']._cron_sync_segment_tasks()
+            self.order.action_sync_segment_tasks()
+        # Only the scheduled sync ran quiet; the interactive one used the setting
+        self.assertEqual(post_summary.call_count, 1)
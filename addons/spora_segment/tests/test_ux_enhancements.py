@@ -161,3 +161,55 @@ class TestUxEnhancements(TransactionCase):
         """UX-05: child_depth is stored for instant reads."""
         field = self.env['sale.order.segment']._fields['child_depth']
         self.assertTrue(field.store, "child_depth should be stored for performance")
+
+    def test_product_list_preview_stored(self):
+        """UX: product_list_preview is stored so list views do not read every line."""
+        field = self.env['sale.order.segment']._fields['product_list_preview']
+        self.assertTrue(field.store, "product_list_preview should be stored for performance")
+
+    def test_product_list_preview_updates(self):
+        """UX: preview follows added lines and product renames."""
+        products = self.env['product.product'].create([
+            {'name': 'Preview %d' % index, 'type': 'service'} for index in range(1, 5)
+        ])
+        self.env['sale.order.line'].create([{
+            'order_id': self.order.id,
+            'product_id': product.id,
+            'product_uom_qty': 1,
+            'segment_id': self.child_segment.id,
+        } for product in products[:2]])
+
+        self.assertEqual(self.child_segment.product_list_preview, 'Preview 1, Preview 2')
+
+        self.env['sale.order.line'].create([{
+            'order_id': self.order.id,
+            'product_id': product.id,
+            'product_uom_qty': 1,
+            'segment_id': self.child_segment.id,
+        } for product in products[2:]])
+        self.assertEqual(self.child_segment.product_list_preview,
+                         'Preview 1, Preview 2, Preview 3... (+1 more)')
+
+        products[0].name = 'Renamed'
+        self.assertEqual(self.child_segment.product_list_preview,
+                         'Renamed, Preview 2, Preview 3... (+1 more)')
+
+    def test_product_list_preview_translated(self):
+        """UX: the stored preview holds the product names of every language."""
+        self.env['res.lang']._activate_lang('es_ES')
+        product = self.env['product.product'].create({'name': 'Painting', 'type': 'service'})
+        product.product_tmpl_id.update_field_translations('name', {'es_ES': 'Pintura'})
+        self.env['sale.order.line'].create({
+            'order_id': self.order.id,
+            'product_id': product.id,
+            'product_uom_qty': 1,
+            'segment_id': self.child_segment.id,
+        })
+        segment = self.child_segment.with_context(lang='en_US')
+        self.assertEqual(segment.product_list_preview, 'Painting')
+        self.assertEqual(segment.with_context(lang='es_ES').product_list_preview, 'Pintura')
+
+        # Editing only a translation refreshes that language
+        product.product_tmpl_id.update_field_translations('name', {'es_ES': 'Pintura mural'})
+        self.assertEqual(segment.with_context(lang='es_ES').product_list_preview, 'Pintura mural')
+        self.assertEqual(segment.product_list_preview, 'Painting')
@@ -0,0 +1,2 @@
+from . import sale_order_bulk_confirm
+from . import sale_order_segment_report_wizard
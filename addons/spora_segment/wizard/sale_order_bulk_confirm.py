@@ -0,0 +1,160 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo import models, fields, api
+from odoo.tools import config
+
+from odoo.addons.spora_segment.models.sale_order import BULK_SEGMENT_TASK_PROFILE
+
+_logger = logging.getLogger(__name__)
+
+BULK_CONFIRM_WORKERS_PARAM = 'spora_segment.bulk_confirm_workers'
+DEFAULT_BULK_CONFIRM_WORKERS = 4
+
+
+class SaleOrderBulkConfirm(models.TransientModel):
+    _name = 'sale.order.bulk.confirm'
+    _description = 'Parallel Confirmation of Sale Orders'
+
+    order_ids = fields.Many2many(
+        'sale.order',
+        string='Orders',
+        default=lambda self: self._default_order_ids(),
+    )
+    state = fields.Selection(
+        [('draft', 'Draft'), ('done', 'Done')],
+        default='draft',
+    )
+    result_ids = fields.One2many(
+        'sale.order.bulk.confirm.result',
+        'wizard_id',
+        string='Results',
+    )
+    success_count = fields.Integer(compute='_compute_counts')
+    failure_count = fields.Integer(compute='_compute_counts')
+
+    @api.model
+    def _default_order_ids(self):
+        if self.env.context.get('active_model') != 'sale.order':
+            return False
+        return [fields.Command.set(self.env.context.get('active_ids', []))]
+
+    @api.depends('result_ids.success')
+    def _compute_counts(self):
+        for wizard in self:
+            successes = wizard.result_ids.filtered('success')
+            wizard.success_count = len(successes)
+            wizard.failure_count = len(wizard.result_ids) - len(successes)
+
+    def action_confirm_orders(self):
+        """Confirm every order in its own transaction and show the outcome.
+
+        Orders are fanned out to a thread pool. Each worker opens a new cursor,
+        so a slow order does not hold back the others and a failing order only
+        rolls back its own confirmation.
+        """
+        self.ensure_one()
+        orders = self.order_ids.filtered(lambda o: o.state in ('draft', 'sent'))
+        wizard = self.with_context(
+            segment_task_profile=self.env.context.get('segment_task_profile', BULK_SEGMENT_TASK_PROFILE),
+        )
+        results = wizard._confirm_orders(orders.ids)
+        results.extend(
+            (order.id, False, f'El pedido está en estado «{order.state}» y no puede confirmarse.')
+            for order in self.order_ids - orders
+        )
+        self.write({
+            'state': 'done',
+            'result_ids': [
+                fields.Command.create({
+                    'order_id': order_id,
+                    'success': success,
+                    'message': message,
+                })
+                for order_id, success, message in results
+            ],
+        })
+        # Confirmations were committed by other cursors
+        self.order_ids.invalidate_recordset()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+            'name': 'Resultado de la confirmación',
+        }
+
+    def _get_worker_count(self, order_count):
+        """Size the pool from the setting, the workload and the db pool."""
+        workers = int(self.env['ir.config_parameter'].sudo().get_param(
+            BULK_CONFIRM_WORKERS_PARAM, DEFAULT_BULK_CONFIRM_WORKERS
+        ))
+        # Keep connections available for the request that waits on the pool
+        max_connections = max(1, config['db_maxconn'] // 2)
+        return max(1, min(workers, order_count, max_connections))
+
+    def _confirm_orders(self, order_ids):
+        """Confirm orders, each one in an isolated transaction.
+
+        Returns:
+            list of (order_id, success, message) in input order
+        """
+        if not order_ids:
+            return []
+        if self.env.registry.in_test_mode() or self._get_worker_count(len(order_ids)) == 1:
+            # New cursors cannot see uncommitted data: isolate with savepoints
+            return [self._confirm_order_with_savepoint(order_id) for order_id in order_ids]
+
+        # Workers only see committed orders; this transaction is not
+        # committed, so that its own work stays atomic with the RPC call
+        self.env.flush_all()
+        with ThreadPoolExecutor(
+            max_workers=self._get_worker_count(len(order_ids)),
+            thread_name_prefix='segment_bulk_confirm',
+        ) as executor:
+            return list(executor.map(
+                self._confirm_order_in_new_cursor,
+                order_ids,
+                [self.env.uid] * len(order_ids),
+                [dict(self.env.context)] * len(order_ids),
+            ))
+
+    def _confirm_order_with_savepoint(self, order_id):
+        order = self.env['sale.order'].browse(order_id)
+        try:
+            with self.env.cr.savepoint():
+                order.action_confirm()
+        except Exception as e:
+            _logger.warning('Bulk confirmation of order %s failed: %s', order.name, e)
+            return order_id, False, str(e)
+        return order_id, True, ''
+
+    def _confirm_order_in_new_cursor(self, order_id, uid, context):
+        """Worker body: confirm one order with a dedicated cursor."""
+        with self.pool.cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            order = env['sale.order'].browse(order_id)
+            try:
+                order.action_confirm()
+                cr.commit()
+            except Exception as e:
+                cr.rollback()
+                _logger.warning('Bulk confirmation of order %s failed: %s', order_id, e)
+                return order_id, False, str(e)
+        return order_id, True, ''
+
+
+class SaleOrderBulkConfirmResult(models.TransientModel):
+    _name = 'sale.order.bulk.confirm.result'
+    _description = 'Parallel Confirmation Result'
+    _order = 'success, id'
+
+    wizard_id = fields.Many2one(
+        'sale.order.bulk.confirm',
+        required=True,
+        ondelete='cascade',
+    )
+    order_id = fields.Many2one('sale.order', string='Order', required=True)
+    success = fields.Boolean()
+    message = fields.Text()
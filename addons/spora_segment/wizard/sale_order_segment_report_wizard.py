@@ -0,0 +1,55 @@
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+
+from odoo.addons.spora_segment.models.sale_order_segment import MAX_HIERARCHY_DEPTH
+from odoo.addons.spora_segment.report.sale_order_segment_report import SUMMARY_DEFAULT_DEPTH
+
+
+class SaleOrderSegmentReportWizard(models.TransientModel):
+    _name = 'sale.order.segment.report.wizard'
+    _description = 'Print Hierarchical Budget'
+
+    order_ids = fields.Many2many(
+        'sale.order',
+        string='Orders',
+        default=lambda self: self._default_order_ids(),
+    )
+    mode = fields.Selection(
+        [
+            ('full', 'Full budget'),
+            ('summary', 'Summary'),
+        ],
+        string='Mode',
+        default='full',
+        required=True,
+    )
+    max_depth = fields.Integer(
+        string='Depth',
+        default=SUMMARY_DEFAULT_DEPTH,
+        help='Number of levels printed in summary mode: 1 prints the root '
+             'segments only, 2 adds their sub-segments and lines, and so on. '
+             'Deeper segments are collapsed into the total of their ancestor.',
+    )
+
+    @api.model
+    def _default_order_ids(self):
+        if self.env.context.get('active_model') != 'sale.order':
+            return False
+        return [fields.Command.set(self.env.context.get('active_ids', []))]
+
+    @api.constrains('mode', 'max_depth')
+    def _check_max_depth(self):
+        # Segment levels plus the level of their lines
+        for wizard in self:
+            if wizard.mode == 'summary' and not 1 <= wizard.max_depth <= MAX_HIERARCHY_DEPTH + 1:
+                raise ValidationError(
+                    'La profundidad del resumen debe estar entre 1 y %d.' % (MAX_HIERARCHY_DEPTH + 1)
+                )
+
+    def action_print(self):
+        self.ensure_one()
+        if self.mode == 'summary':
+            return self.env.ref('spora_segment.action_report_sale_order_segment_summary').report_action(
+                self.order_ids, data={'max_depth': self.max_depth},
+            )
+        return self.env.ref('spora_segment.action_report_sale_order_segment').report_action(self.order_ids)